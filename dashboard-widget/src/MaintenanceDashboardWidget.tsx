@@ -1,5 +1,5 @@
 import "./styles.css";
-import {useState, useEffect, useCallback, useMemo} from "react";
+import {useState, useEffect, useMemo, useRef} from "react";
 import RemoteComponentWrapper from "customer_site/RemoteComponentWrapper";
 import {useAgentChannel, useAgentSendUiCmd, useAgent} from "customer_site/hooks";
 import {useRemoteParams} from "customer_site/useRemoteParams";
@@ -19,9 +19,58 @@ function cn(...classes: (string | false | undefined | null)[]) {
   return classes.filter(Boolean).join(" ");
 }
 
-/** Read a tag value from the tag_values aggregate using the app key. */
-function getTag(aggregate: any, appKey: string, tagName: string): any {
-  return aggregate?.[appKey]?.[tagName] ?? null;
+/** Name of the fleet digest channel maintained by the dashboard app. */
+const DIGEST_CHANNEL = "maintenance_digest";
+
+/** Rows rendered at once; only these rows mount their per-device hooks. */
+const PAGE_SIZE = 50;
+
+/** Digest updates arriving within this window are rendered together. */
+const UPDATE_BATCH_MS = 250;
+
+/**
+ * Follow a frequently changing value, re-rendering at most once per `delayMs`.
+ * A burst of fleet updates becomes one state update with the latest value.
+ */
+function useBatchedValue<T>(value: T, delayMs: number): T {
+  const [batched, setBatched] = useState(value);
+  const latest = useRef(value);
+  const timer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  useEffect(() => {
+    latest.current = value;
+    if (timer.current == null) {
+      timer.current = setTimeout(() => {
+        timer.current = null;
+        setBatched(latest.current);
+      }, delayMs);
+    }
+  }, [value, delayMs]);
+
+  useEffect(() => () => {
+    if (timer.current != null) clearTimeout(timer.current);
+  }, []);
+
+  return batched;
+}
+
+/** Read a device's maintenance tag from the fleet digest aggregate. */
+function getTag(digest: any, deviceId: string, tagName: string): any {
+  return digest?.devices?.[deviceId]?.[tagName] ?? null;
+}
+
+/** Order devices by the digest's fleet index, without re-sorting them. */
+function orderByIndex(devices: Device[], digest: any): Device[] {
+  const byId = new Map(devices.map((d) => [d.id, d]));
+  const ordered: Device[] = [];
+  for (const [, deviceId] of digest?.index ?? []) {
+    const device = byId.get(String(deviceId));
+    if (device) {
+      ordered.push(device);
+      byId.delete(device.id);
+    }
+  }
+  return [...ordered, ...byId.values()];
 }
 
 /** Extract the device list from deployment_config using the app key. */
@@ -45,11 +94,6 @@ interface Device {
   name: string;
 }
 
-interface DeviceTagData {
-  aggregate: any;
-  isLoading: boolean;
-}
-
 // ---------------------------------------------------------------------------
 // Timestamp (relative text + absolute tooltip on hover)
 // ---------------------------------------------------------------------------
@@ -78,27 +122,6 @@ function Timestamp({value}: { value: number }) {
   );
 }
 
-// ---------------------------------------------------------------------------
-// DeviceTagsFetcher – invisible component that subscribes to a device's tags
-// channel and reports data back to the parent via callback.
-// ---------------------------------------------------------------------------
-
-function DeviceTagsFetcher({
-                             deviceId,
-                             onData,
-                           }: {
-  deviceId: string;
-  onData: (id: string, data: DeviceTagData) => void;
-}) {
-  const {aggregate, isLoading} = useAgentChannel(deviceId, "tag_values");
-
-  useEffect(() => {
-    onData(deviceId, {aggregate, isLoading});
-  }, [aggregate, isLoading, deviceId, onData]);
-
-  return null;
-}
-
 // ---------------------------------------------------------------------------
 // DeviceRow – visible table row with its own useAgentSendUiCmd hook.
 // ---------------------------------------------------------------------------
@@ -109,6 +132,9 @@ function DeviceRow({
                      nextServiceEst,
                      hoursTillService,
                      kmsTillService,
+                     hoursDueEst,
+                     kmsDueEst,
+                     dateDue,
                      lastServiceDate,
                      isLoading,
                    }: {
@@ -117,6 +143,9 @@ function DeviceRow({
   nextServiceEst: number | null;
   hoursTillService: number | null;
   kmsTillService: number | null;
+  hoursDueEst: number | null;
+  kmsDueEst: number | null;
+  dateDue: number | null;
   lastServiceDate: number | null;
   isLoading: boolean;
 }) {
@@ -204,6 +233,24 @@ function DeviceRow({
                 <span className="text-muted-foreground">Kms till service: </span>
                 <span className="font-medium">{kmsDisplay ?? "-"}</span>
               </div>
+              <div>
+                <span className="text-muted-foreground">Due by hours: </span>
+                <span className="font-medium">
+                  {hoursDueEst != null ? <Timestamp value={hoursDueEst}/> : "-"}
+                </span>
+              </div>
+              <div>
+                <span className="text-muted-foreground">Due by kms: </span>
+                <span className="font-medium">
+                  {kmsDueEst != null ? <Timestamp value={kmsDueEst}/> : "-"}
+                </span>
+              </div>
+              <div>
+                <span className="text-muted-foreground">Due by date: </span>
+                <span className="font-medium">
+                  {dateDue != null ? <Timestamp value={dateDue}/> : "-"}
+                </span>
+              </div>
               <div>
                 <span className="text-muted-foreground">Last service: </span>
                 <span className="font-medium">
@@ -240,36 +287,21 @@ function MaintenanceDashboardWidgetInner({uiElement}: { uiElement: UiRemoteCompo
     [deploymentConfig, uiElement.app_key, agentId],
   );
 
-  // 2. Collect tag data from each DeviceTagsFetcher
-  const [tagData, setTagData] = useState<Record<string, DeviceTagData>>({});
-
-  const handleDeviceData = useCallback(
-    (deviceId: string, data: DeviceTagData) => {
-      setTagData((prev) => {
-        const existing = prev[deviceId];
-        if (
-          existing?.aggregate === data.aggregate &&
-          existing?.isLoading === data.isLoading
-        ) {
-          return prev; // no change – avoid unnecessary re-render
-        }
-        return {...prev, [deviceId]: data};
-      });
-    },
-    [],
-  );
+  // 2. One subscription to the fleet digest, which the dashboard app keeps
+  // up to date with every device's maintenance tags
+  const {aggregate: liveDigest, isLoading: digestLoading} =
+    useAgentChannel(agentId, DIGEST_CHANNEL);
+  const digest = useBatchedValue(liveDigest, UPDATE_BATCH_MS);
+
+  // 3. Order by next service date – soonest first, devices without an
+  // estimate last. The digest keeps the fleet index in this order already.
+  const sorted = useMemo(() => orderByIndex(devices, digest), [devices, digest]);
 
-  // 3. Sort by next service date – soonest first, nulls last
-  const sorted = useMemo(() => {
-    return [...devices].sort((a, b) => {
-      const aEst = getTag(tagData[a.id]?.aggregate, appKey, "next_service_est");
-      const bEst = getTag(tagData[b.id]?.aggregate, appKey, "next_service_est");
-      if (aEst == null && bEst == null) return 0;
-      if (aEst == null) return 1;
-      if (bEst == null) return -1;
-      return aEst - bEst;
-    });
-  }, [devices, tagData, appKey]);
+  // 4. Only render one page of rows at a time
+  const [page, setPage] = useState(0);
+  const pageCount = Math.max(1, Math.ceil(sorted.length / PAGE_SIZE));
+  const currentPage = Math.min(page, pageCount - 1);
+  const visible = sorted.slice(currentPage * PAGE_SIZE, (currentPage + 1) * PAGE_SIZE);
 
   // Keep relative timestamps fresh
   const [, setTick] = useState(0);
@@ -290,15 +322,6 @@ function MaintenanceDashboardWidgetInner({uiElement}: { uiElement: UiRemoteCompo
 
   return (
     <>
-      {/* Hidden data fetchers – one per device */}
-      {devices.map((d) => (
-        <DeviceTagsFetcher
-          key={d.id}
-          deviceId={d.id}
-          onData={handleDeviceData}
-        />
-      ))}
-
       <div className="relative w-full overflow-x-auto">
         <table className="w-full caption-bottom text-xs">
           <thead className="[&_tr]:border-b">
@@ -334,25 +357,49 @@ function MaintenanceDashboardWidgetInner({uiElement}: { uiElement: UiRemoteCompo
               </td>
             </tr>
           ) : (
-            sorted.map((device) => {
-              const agg = tagData[device.id]?.aggregate;
-              return (
-                <DeviceRow
-                  key={device.id}
-                  device={device}
-                  app_key={appKey}
-                  nextServiceEst={getTag(agg, appKey, "next_service_est")}
-                  hoursTillService={getTag(agg, appKey, "hours_till_next_service")}
-                  kmsTillService={getTag(agg, appKey, "kms_till_next_service")}
-                  lastServiceDate={getTag(agg, appKey, "last_service_date")}
-                  isLoading={tagData[device.id]?.isLoading ?? true}
-                />
-              );
-            })
+            visible.map((device) => (
+              <DeviceRow
+                key={device.id}
+                device={device}
+                app_key={appKey}
+                nextServiceEst={getTag(digest, device.id, "next_service_est")}
+                hoursTillService={getTag(digest, device.id, "hours_till_next_service")}
+                kmsTillService={getTag(digest, device.id, "kms_till_next_service")}
+                hoursDueEst={getTag(digest, device.id, "hours_due_est")}
+                kmsDueEst={getTag(digest, device.id, "kms_due_est")}
+                dateDue={getTag(digest, device.id, "date_due")}
+                lastServiceDate={getTag(digest, device.id, "last_service_date")}
+                isLoading={digestLoading}
+              />
+            ))
           )}
           </tbody>
         </table>
       </div>
+
+      {pageCount > 1 && (
+        <div className="flex items-center justify-between px-2 py-2 text-xs text-muted-foreground">
+          <span>
+            {currentPage * PAGE_SIZE + 1}–{currentPage * PAGE_SIZE + visible.length} of {sorted.length}
+          </span>
+          <div className="flex gap-2">
+            <button
+              onClick={() => setPage(currentPage - 1)}
+              disabled={currentPage === 0}
+              className="inline-flex items-center justify-center rounded-md border border-border font-medium h-6 px-2 hover:bg-muted/50 hover:text-foreground transition-all disabled:pointer-events-none disabled:opacity-50 select-none"
+            >
+              Previous
+            </button>
+            <button
+              onClick={() => setPage(currentPage + 1)}
+              disabled={currentPage >= pageCount - 1}
+              className="inline-flex items-center justify-center rounded-md border border-border font-medium h-6 px-2 hover:bg-muted/50 hover:text-foreground transition-all disabled:pointer-events-none disabled:opacity-50 select-none"
+            >
+              Next
+            </button>
+          </div>
+        </div>
+      )}
     </>
   );
 }
@@ -1,11 +1,11 @@
-from pydoover.cloud.processor import run_app
-
-from .application import MaintenanceDashboardApp
-from .app_config import MaintenanceDashboardConfig
-
-
 def handler(event, context):
     """Lambda handler entry point."""
+    # see processor.handler: pydoover is only loaded once there's an event
+    from pydoover.cloud.processor import run_app
+
+    from .application import MaintenanceDashboardApp
+    from .app_config import MaintenanceDashboardConfig
+
     MaintenanceDashboardConfig.clear_elements()
     return run_app(
         MaintenanceDashboardApp(config=MaintenanceDashboardConfig()),
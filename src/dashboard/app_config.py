@@ -1,13 +1,20 @@
 from pathlib import Path
 
 from pydoover import config
-from pydoover.cloud.processor import ExtendedPermissionsConfig, SubscriptionConfig, ScheduleConfig
+from pydoover.cloud.processor import (
+    ExtendedPermissionsConfig,
+    ScheduleConfig,
+    SubscriptionConfig,
+)
 
 
 class MaintenanceDashboardConfig(config.Schema):
     def __init__(self):
         self.subscription = SubscriptionConfig(default="deployment_config")
         self.extended_permissions = ExtendedPermissionsConfig()
+        # sweeps the fleet: refreshes the digest and raises the service alerts
+        # that come due with time alone
+        self.schedule = ScheduleConfig(default="rate(1 hour)")
 
 
 def export():
@@ -1,4 +1,6 @@
 import logging
+import time
+
 from datetime import datetime, timezone
 
 from pydoover.cloud.processor import Application
@@ -9,7 +11,13 @@ from pydoover.cloud.processor.types import (
 )
 from pydoover.ui import RemoteComponent
 
+from maintenance_common.alerts import ALERT_CHANNEL
+from maintenance_common.concurrency import gather_isolated
+from maintenance_common.metrics import InvocationMetrics
+
+from . import sweep
 from .app_config import MaintenanceDashboardConfig
+from .fleet_digest import DIGEST_CHANNEL, digest_entry, digest_patch, fleet_device_ids
 
 log = logging.getLogger(__name__)
 
@@ -17,6 +25,12 @@ WIDGET_NAME = "MaintenanceDashboard"
 FILE_CHANNEL = "maintenance_dashboard_widget"
 MANAGER_APP_KEY = "maintenance_manager_1"
 
+# The sweep reads this many devices at a time, in batches of this size, and
+# starts no new batch after this long, well inside the 300 s Lambda timeout
+SWEEP_CONCURRENCY = 25
+SWEEP_BATCH_SIZE = 100
+SWEEP_BUDGET_S = 240
+
 
 class MaintenanceDashboardApp(Application):
     """
@@ -25,12 +39,23 @@ class MaintenanceDashboardApp(Application):
     On deployment, the deployment_config aggregate is updated, which
     triggers on_aggregate_update via our subscription. We then push
     ui_state so the widget appears in the UI interpreter.
+
+    The maintenance tags of every device in the DEVICE_MAP are summarised in
+    a single fleet digest aggregate on our own agent, so the widget only
+    needs one channel subscription however many devices there are. We read
+    the devices' tags ourselves, with our extended permissions, rather than
+    relying on their updates being routed to us: on deployment and on every
+    scheduled run, writing only the devices that changed. The same sweep
+    raises the service alerts that come due with time alone (see sweep.py).
     """
 
     config: MaintenanceDashboardConfig
 
     async def setup(self):
         """Called once before processing any event."""
+        self.metrics = InvocationMetrics("maintenance_dashboard")
+        self.api = self.metrics.instrument(self.api)
+
         self.ui_manager.set_children(
             [
                 RemoteComponent(
@@ -44,19 +69,137 @@ class MaintenanceDashboardApp(Application):
         )
 
     async def on_aggregate_update(self, event: AggregateUpdateEvent):
+        self.metrics.set_property("channel", event.channel_name)
+        try:
+            await self._on_deployment(event)
+        finally:
+            self.metrics.emit()
+
+    async def on_schedule(self, event):
+        self.metrics.set_property("channel", "schedule")
+        try:
+            with self.metrics.span("sweep"):
+                await self._sweep_fleet()
+        finally:
+            self.metrics.emit()
+
+    async def _on_deployment(self, event: AggregateUpdateEvent):
         """Triggered when deployment_config aggregate is updated (i.e. on deployment)."""
         log.info(f"Aggregate update received for agent {self.agent_id}")
-        await self.ui_manager.push_async(even_if_empty=True)
+        # the ui_state patch has to land after the push, but the ping and
+        # the sweep are independent of both
+        await gather_isolated(
+            self._push_ui_state(),
+            self.metrics.timed("ping", self._ping_connection()),
+            self.metrics.timed("sweep", self._sweep_fleet()),
+        )
+
+    async def _sweep_fleet(self):
+        """
+        Sweep every device in the fleet, in batches, then bring the digest up
+        to date with the devices that were read.
+
+        No new batch is started once the sweep has run for ``SWEEP_BUDGET_S``,
+        so a very large fleet can't run into the Lambda timeout. The devices
+        it didn't reach keep their digest entries until the next run.
+        """
+        deployment_config, digest = await gather_isolated(
+            self.api.fetch_channel_aggregate(self.agent_id, "deployment_config"),
+            self.api.fetch_channel_aggregate(self.agent_id, DIGEST_CHANNEL),
+        )
+        device_ids = fleet_device_ids(deployment_config, self.app_key, self.agent_id)
+        log.info(f"Sweeping {len(device_ids)} devices")
+
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        deadline = time.monotonic() + SWEEP_BUDGET_S
+        entries = {}
+        unread = set()
+        for i, batch in enumerate(sweep.batches(device_ids, SWEEP_BATCH_SIZE)):
+            if i and time.monotonic() > deadline:
+                unread.update(str(device_id) for device_id in batch)
+                continue
+
+            results = await gather_isolated(
+                *(self._sweep_device(device_id, now_ms) for device_id in batch),
+                limit=SWEEP_CONCURRENCY,
+            )
+            for device_id, (read, entry) in zip(batch, results):
+                if not read:
+                    unread.add(str(device_id))
+                elif entry is not None:
+                    entries[str(device_id)] = entry
+
+        if unread:
+            log.warning(f"Sweep didn't read {len(unread)} of {len(device_ids)} devices")
+            stored = (digest or {}).get("devices")
+            if isinstance(stored, dict):
+                entries.update(
+                    {
+                        device_id: stored[device_id]
+                        for device_id in unread & stored.keys()
+                    }
+                )
+        self.metrics.set_property("devices_unread", len(unread))
+
+        patch = digest_patch(digest, entries)
+        self.metrics.set_property(
+            "devices_changed", len((patch or {}).get("devices", ()))
+        )
+        if patch is None:
+            return
+
+        log.info(f"Updating fleet digest for {len(patch.get('devices', ()))} devices")
+        await self.api.update_aggregate(self.agent_id, DIGEST_CHANNEL, patch)
+
+    async def _sweep_device(self, device_id, now_ms):
+        """
+        Raise the alerts that have come due for one device. Returns whether it
+        was read, and its digest entry.
+        """
+        try:
+            tag_values, device_config = await gather_isolated(
+                self.api.fetch_channel_aggregate(device_id, "tag_values"),
+                self.api.fetch_channel_aggregate(device_id, "deployment_config"),
+            )
+            manager_tags = (tag_values or {}).get(MANAGER_APP_KEY)
+            levels, messages = sweep.alert_changes(
+                manager_tags,
+                sweep.manager_config(device_config, MANAGER_APP_KEY),
+                now_ms,
+            )
+            if levels:
+                log.info(f"Alert levels changed for device {device_id}: {levels}")
+                await gather_isolated(
+                    self.api.update_aggregate(
+                        device_id, "tag_values", {MANAGER_APP_KEY: levels}
+                    ),
+                    *(
+                        self.api.create_message(device_id, ALERT_CHANNEL, message)
+                        for message in messages
+                    ),
+                )
+        except Exception:
+            # one device doesn't hold up the rest of the fleet
+            log.exception(f"Failed to sweep device {device_id}")
+            return False, None
+
+        return True, digest_entry(manager_tags)
+
+    async def _push_ui_state(self):
+        with self.metrics.span("ui_push"):
+            await self.ui_manager.push_async(even_if_empty=True)
 
         # Patch defaultOpen onto our application so the widget is
         # expanded on page load instead of collapsed.
-        await self.api.update_aggregate(
-            self.agent_id,
-            "ui_state",
-            {"state": {"children": {self.app_key: {"defaultOpen": True}}}},
-        )
+        with self.metrics.span("ui_state"):
+            await self.api.update_aggregate(
+                self.agent_id,
+                "ui_state",
+                {"state": {"children": {self.app_key: {"defaultOpen": True}}}},
+            )
         log.info(f"Pushed ui_state with {WIDGET_NAME} widget entry")
 
+    async def _ping_connection(self):
         await self.api.ping_connection_at(
             self.agent_id,
             datetime.now(timezone.utc),
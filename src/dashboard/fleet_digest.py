@@ -0,0 +1,97 @@
+from .fleet_index import SORT_KEY, FleetIndex
+
+DIGEST_CHANNEL = "maintenance_digest"
+
+# maintenance manager tags summarised for each device
+DIGEST_TAGS = (
+    "next_service_est",
+    "hours_till_next_service",
+    "kms_till_next_service",
+    "hours_due_est",
+    "kms_due_est",
+    "date_due",
+    "last_service_date",
+)
+
+
+def digest_entry(manager_tags) -> dict | None:
+    """
+    A device's digest entry, from its maintenance manager's tags. Returns None
+    if it has none of the digest's tags.
+    """
+    if not isinstance(manager_tags, dict):
+        return None
+
+    entry = {key: manager_tags[key] for key in DIGEST_TAGS if key in manager_tags}
+    return entry or None
+
+
+def digest_patch(digest, entries) -> dict | None:
+    """
+    The aggregate patch that brings ``digest`` up to date with ``entries``,
+    the current entry of every device in the fleet by device id.
+
+    Only the devices whose entry changed are sent, with None for a tag or a
+    device that has gone, and the fleet index is updated by moving the devices
+    whose estimate changed rather than re-sorting it. Returns None if nothing
+    changed.
+    """
+    digest = digest if isinstance(digest, dict) else {}
+    stored = digest.get("devices")
+    if not isinstance(stored, dict):
+        stored = {}
+
+    # a digest from before the index was kept gets one built
+    rebuild = not isinstance(digest.get("index"), list)
+    index = FleetIndex.build(entries) if rebuild else FleetIndex.from_digest(digest)
+    moved = rebuild
+
+    devices = {}
+    for device_id in stored.keys() | entries.keys():
+        previous = stored.get(device_id)
+        entry = entries.get(device_id)
+        if entry == previous:
+            continue
+
+        if entry is None:
+            devices[device_id] = None
+        elif isinstance(previous, dict):
+            devices[device_id] = {
+                **{key: None for key in previous if key not in entry},
+                **entry,
+            }
+        else:
+            devices[device_id] = entry
+
+        if not rebuild:
+            previous_est = (
+                previous.get(SORT_KEY) if isinstance(previous, dict) else None
+            )
+            moved |= index.move(device_id, previous_est, (entry or {}).get(SORT_KEY))
+
+    patch = {}
+    if devices:
+        patch["devices"] = devices
+    if moved:
+        patch["index"] = index.to_list()
+    return patch or None
+
+
+def fleet_device_ids(deployment_config, app_key, self_id) -> list[int]:
+    """The devices in the dashboard's ``DEVICE_MAP``, other than the dashboard."""
+    try:
+        device_map = deployment_config["applications"][app_key]["DEVICE_MAP"]
+    except (KeyError, TypeError):
+        return []
+    if not isinstance(device_map, dict):
+        return []
+
+    ids = []
+    for device_id in device_map:
+        if str(device_id) == str(self_id):
+            continue
+        try:
+            ids.append(int(device_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
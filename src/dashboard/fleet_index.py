@@ -0,0 +1,98 @@
+"""
+Fleet devices sorted by when their next service is due.
+
+The index is kept in the fleet digest alongside the devices, as a list of
+``[next_service_est, device_id]`` pairs in ascending order, so the widget and
+queries like "next 20 machines due" or "due in the next 14 days" read it in
+order rather than sorting or scanning the fleet. It is built once when the
+digest is seeded, and after that moving one device whose estimate changed is
+a binary search to remove it and another to insert it, not a re-sort.
+"""
+
+from bisect import bisect_left, insort
+
+SORT_KEY = "next_service_est"
+
+
+class FleetIndex:
+    def __init__(self, entries=None):
+        # kept sorted by (estimate, device id)
+        self.entries: list[tuple[int, str]] = list(entries or [])
+
+    @classmethod
+    def build(cls, devices):
+        """The index of digest device entries, for seeding the digest."""
+        entries = []
+        if isinstance(devices, dict):
+            for device_id, entry in devices.items():
+                est = entry.get(SORT_KEY) if isinstance(entry, dict) else None
+                if _is_number(est):
+                    entries.append((int(est), str(device_id)))
+        return cls(sorted(entries))
+
+    @classmethod
+    def from_digest(cls, digest):
+        """The index stored in a digest, already in order."""
+        stored = digest.get("index") if isinstance(digest, dict) else None
+        if not isinstance(stored, list):
+            return cls()
+        try:
+            return cls((int(est), str(device_id)) for est, device_id in stored)
+        except (TypeError, ValueError):
+            return cls()
+
+    def to_list(self):
+        return [[est, device_id] for est, device_id in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def move(self, device_id, old_est, new_est) -> bool:
+        """Reposition a device after its estimate changed. True if the index changed."""
+        device_id = str(device_id)
+        old = (int(old_est), device_id) if _is_number(old_est) else None
+        new = (int(new_est), device_id) if _is_number(new_est) else None
+
+        if new is not None and new == old and self._find(new) is not None:
+            return False
+
+        removed = self._remove(device_id, old)
+        if new is not None:
+            insort(self.entries, new)
+        return removed or new is not None
+
+    def top(self, k):
+        """The ``k`` devices due soonest, as ``(estimate, device_id)`` pairs."""
+        return self.entries[:k]
+
+    def due_between(self, start_ms, end_ms):
+        """The devices due from ``start_ms`` up to but not including ``end_ms``."""
+        lo = bisect_left(self.entries, (start_ms, ""))
+        hi = bisect_left(self.entries, (end_ms, ""), lo)
+        return self.entries[lo:hi]
+
+    def _find(self, entry):
+        i = bisect_left(self.entries, entry)
+        if i < len(self.entries) and self.entries[i] == entry:
+            return i
+        return None
+
+    def _remove(self, device_id, entry) -> bool:
+        if entry is None:
+            return False
+
+        i = self._find(entry)
+        if i is not None:
+            del self.entries[i]
+            return True
+
+        # the digest and the index disagree, so look for the device
+        for i, (_, indexed_id) in enumerate(self.entries):
+            if indexed_id == device_id:
+                del self.entries[i]
+                return True
+        return False
+
+
+def _is_number(value):
+    return isinstance(value, int | float) and not isinstance(value, bool)
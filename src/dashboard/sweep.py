@@ -0,0 +1,104 @@
+"""
+The dashboard's scheduled sweep of its fleet.
+
+A manager's forecast tags only change when it handles a message, but how close
+a machine is to its next service changes every day. A machine parked for weeks
+can become due soon or overdue without the manager running at all. So on its
+schedule the dashboard walks every device in its DEVICE_MAP in batches,
+reading each manager's tags and deployment config once. It raises the alerts
+that have come due since, as the manager would on its next message, and
+brings the fleet digest up to date.
+"""
+
+from maintenance_common import alerts
+from maintenance_common.schedules import parse_schedules
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# the manager's main service interval, which has no tag prefix
+MAIN_SCHEDULE = ("", "Service")
+
+# the manager's settings the sweep needs, by their key in its deployment
+# config, with the manager's defaults
+SCHEDULES_KEY = "additional_service_schedules"
+THRESHOLD_KEYS = {
+    "alert_days_before_service": alerts.DEFAULT_SOON_DAYS,
+    "alert_hours_before_service": None,
+    "alert_kms_before_service": None,
+}
+
+
+def batches(items, size):
+    """``items`` in consecutive lists of at most ``size``."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def manager_config(deployment_config, app_key) -> dict:
+    """The manager's settings from a device's deployment config, or {}."""
+    try:
+        config = deployment_config["applications"][app_key]
+    except (KeyError, TypeError):
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def alert_changes(manager_tags, config, now_ms) -> tuple[dict, list[dict]]:
+    """
+    The alert level tags to write, and the alerts to publish, for the
+    schedules whose alert level has moved since the manager last set it.
+
+    ``config`` is the manager's settings from its deployment config, for its
+    thresholds and additional schedules.
+    """
+    if not isinstance(manager_tags, dict):
+        return {}, []
+
+    thresholds = [
+        _number(config.get(key, default)) for key, default in THRESHOLD_KEYS.items()
+    ]
+    schedules = [
+        MAIN_SCHEDULE,
+        *(
+            (schedule.prefix, schedule.name)
+            for schedule in parse_schedules(config.get(SCHEDULES_KEY))
+        ),
+    ]
+
+    levels = {}
+    messages = []
+    for prefix, name in schedules:
+        remaining = _remaining(manager_tags, prefix, now_ms)
+        level = alerts.alert_level(*remaining.values(), *thresholds)
+        # no tag is the same as OK, as for the manager
+        previous = manager_tags.get(f"{prefix}alert_level", alerts.OK)
+        if level == previous:
+            continue
+
+        levels[f"{prefix}alert_level"] = level
+        messages.append(alerts.alert_message(name, level, previous, remaining))
+    return levels, messages
+
+
+def _remaining(manager_tags, prefix, now_ms):
+    """How far a schedule is from being due, from its published tags."""
+    next_service_est = _number(manager_tags.get(f"{prefix}next_service_est"))
+    return {
+        "days_till_next_service": (
+            int((next_service_est - now_ms) // DAY_MS)
+            if next_service_est is not None
+            else None
+        ),
+        "hours_till_next_service": _number(
+            manager_tags.get(f"{prefix}hours_till_next_service")
+        ),
+        "kms_till_next_service": _number(
+            manager_tags.get(f"{prefix}kms_till_next_service")
+        ),
+    }
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return None
+    return value
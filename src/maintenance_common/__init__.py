@@ -0,0 +1,7 @@
+"""
+Helpers shared by the maintenance manager and the maintenance dashboard.
+
+Both handlers import these as ``maintenance_common``, which is packaged
+alongside ``processor`` and ``dashboard``, so neither depends on the other's
+internals.
+"""
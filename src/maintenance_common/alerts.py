@@ -0,0 +1,70 @@
+"""
+Service alert levels.
+
+Each service schedule is in one of three alert levels, worked out from how
+far it is from being due. The manager keeps the current level in a tag and
+only publishes an alert when it changes, so a machine that stays due soon
+doesn't raise the same alert on every message.
+"""
+
+OK = "ok"
+DUE_SOON = "due_soon"
+OVERDUE = "overdue"
+
+ALERT_CHANNEL = "maintenance_alerts"
+
+# the manager's default due soon threshold, when none is configured
+DEFAULT_SOON_DAYS = 7.0
+
+_DESCRIPTIONS = {
+    OK: "is no longer due",
+    DUE_SOON: "is due soon",
+    OVERDUE: "is overdue",
+}
+
+
+def alert_level(
+    days_till,
+    hours_till,
+    kms_till,
+    soon_days=None,
+    soon_hours=None,
+    soon_kms=None,
+) -> str:
+    """
+    The alert level for a service, from the time, hours and kms left until it's due.
+
+    It is overdue once any of them has run out, and due soon once any is
+    within its ``soon_*`` threshold. A remaining value or threshold of None
+    is ignored.
+    """
+    if (
+        (days_till is not None and days_till < 0)
+        or (hours_till is not None and hours_till <= 0)
+        or (kms_till is not None and kms_till <= 0)
+    ):
+        return OVERDUE
+
+    if (
+        _within(days_till, soon_days)
+        or _within(hours_till, soon_hours)
+        or _within(kms_till, soon_kms)
+    ):
+        return DUE_SOON
+
+    return OK
+
+
+def alert_message(schedule_name, level, previous_level, remaining) -> dict:
+    """The message published when a schedule's alert level changes."""
+    return {
+        "schedule": schedule_name,
+        "level": level,
+        "previous_level": previous_level,
+        "message": f"{schedule_name} {_DESCRIPTIONS[level]}",
+        **remaining,
+    }
+
+
+def _within(remaining, threshold):
+    return remaining is not None and threshold is not None and remaining <= threshold
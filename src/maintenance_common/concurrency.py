@@ -0,0 +1,41 @@
+"""
+Running independent API calls concurrently.
+
+Most of a handler's time is spent waiting on the Doover API, and calls that
+don't depend on each other (a tag flush and a UI push, say) needn't wait for
+each other. :func:`gather_isolated` runs them together, so the handler takes
+about as long as its slowest call rather than the sum of them all.
+"""
+
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+# enough for every independent call a handler makes, without flooding the API
+# when a caller passes a longer list
+DEFAULT_LIMIT = 4
+
+
+async def gather_isolated(*aws, limit=DEFAULT_LIMIT) -> list:
+    """
+    Await ``aws`` concurrently, at most ``limit`` at a time.
+
+    A failure doesn't cancel the others: every awaitable runs to completion,
+    then the first exception is raised and any others are logged. Otherwise
+    returns the results in order.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    results = await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=True)
+
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for error in errors[1:]:
+        log.error(f"Concurrent call also failed: {error!r}")
+    if errors:
+        raise errors[0]
+    return results
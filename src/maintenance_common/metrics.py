@@ -0,0 +1,169 @@
+"""
+Lightweight per-invocation instrumentation.
+
+An :class:`InvocationMetrics` records how long each stage of a handler takes
+and how many API round trips (and bytes) it makes, then writes one line of
+CloudWatch Embedded Metric Format JSON to stdout, which Lambda turns into
+metrics.
+
+Instrumentation is off unless the ``MAINTENANCE_METRICS`` environment variable
+is set. While it is off, spans are a shared no-op context manager and the API
+client is left unwrapped.
+
+Setting ``MAINTENANCE_TRACE_MEMORY`` as well adds the invocation's peak Python
+heap usage, measured with :mod:`tracemalloc`. Tracing slows allocation down
+noticeably, so it is for investigating memory use rather than for production.
+"""
+
+import contextlib
+import inspect
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ENV_VAR = "MAINTENANCE_METRICS"
+TRACE_MEMORY_ENV_VAR = "MAINTENANCE_TRACE_MEMORY"
+NAMESPACE = "MaintenanceManager"
+
+_NOOP_SPAN = contextlib.nullcontext()
+
+
+def metrics_enabled(env_var=ENV_VAR) -> bool:
+    return os.environ.get(env_var, "").lower() in ("1", "true", "yes")
+
+
+class InvocationMetrics:
+    def __init__(
+        self,
+        app_name: str,
+        enabled: bool | None = None,
+        stream=None,
+        trace_memory: bool | None = None,
+    ):
+        self.app_name = app_name
+        self.enabled = metrics_enabled() if enabled is None else enabled
+        self.stream = stream
+
+        if trace_memory is None:
+            trace_memory = metrics_enabled(TRACE_MEMORY_ENV_VAR)
+        # only stop tracing in emit() if it was started here
+        self._tracing = self.enabled and trace_memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+        self.spans: dict[str, float] = {}
+        self.api_calls: dict[str, int] = {}
+        self.api_bytes = 0
+        self.properties: dict[str, object] = {}
+        self._start = time.perf_counter()
+
+    def span(self, name: str):
+        """Time a stage of the handler. Repeated spans with one name add up."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._timed(name)
+
+    async def timed(self, name: str, aw):
+        """Await ``aw`` inside a span, so concurrent calls are timed separately."""
+        with self.span(name):
+            return await aw
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.spans[name] = self.spans.get(name, 0) + elapsed
+
+    def count_call(self, name: str, nbytes: int = 0):
+        if not self.enabled:
+            return
+        self.api_calls[name] = self.api_calls.get(name, 0) + 1
+        self.api_bytes += nbytes
+
+    def set_property(self, key: str, value):
+        """Attach a value to the metric line without making it a metric."""
+        if self.enabled:
+            self.properties[key] = value
+
+    def instrument(self, api):
+        """Wrap an API client so every call it makes is counted."""
+        if not self.enabled or isinstance(api, _CountingAPI):
+            return api
+        return _CountingAPI(api, self)
+
+    def emit(self):
+        """Write the invocation's metrics as one EMF JSON line."""
+        if not self.enabled:
+            return
+
+        total_ms = (time.perf_counter() - self._start) * 1000
+        values = {
+            "invocation_ms": total_ms,
+            "api_calls": sum(self.api_calls.values()),
+            "api_bytes": self.api_bytes,
+            **{f"{name}_ms": ms for name, ms in self.spans.items()},
+        }
+        if self._tracing:
+            _, values["peak_memory_bytes"] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._tracing = False
+        units = {
+            "api_calls": "Count",
+            "api_bytes": "Bytes",
+            "peak_memory_bytes": "Bytes",
+        }
+
+        line = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": NAMESPACE,
+                        "Dimensions": [["App"]],
+                        "Metrics": [
+                            {"Name": name, "Unit": units.get(name, "Milliseconds")}
+                            for name in values
+                        ],
+                    }
+                ],
+            },
+            "App": self.app_name,
+            **values,
+            "api_calls_by_method": self.api_calls,
+            **self.properties,
+        }
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(line, default=str) + "\n")
+        stream.flush()
+
+
+class _CountingAPI:
+    """Pass-through proxy counting calls to an API client's async methods."""
+
+    def __init__(self, api, metrics: InvocationMetrics):
+        self._api = api
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def counted(*args, **kwargs):
+            result = await attr(*args, **kwargs)
+            self._metrics.count_call(name, _payload_size(args, kwargs, result))
+            return result
+
+        return counted
+
+
+def _payload_size(*parts) -> int:
+    try:
+        return len(json.dumps(parts, default=str))
+    except (TypeError, ValueError):
+        return 0
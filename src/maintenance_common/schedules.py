@@ -0,0 +1,113 @@
+"""
+Named service schedules, forecast alongside the main service interval.
+
+Machines often have layered schedules, e.g. a 250 h oil service, a 1000 h
+major service and a 12 month inspection. Each :class:`ServiceSchedule` is
+forecast from the same meter readings and usage rates as the main interval,
+and keeps its own copy of the service tags under a prefix made from its name.
+"""
+
+import re
+
+# keys of each schedule entry in the config, as exported to doover_config.json
+NAME_FIELD = "name"
+INTERVAL_FIELDS = {
+    "interval_hours": "interval_(hours)",
+    "interval_kms": "interval_(kms)",
+    "interval_months": "interval_(months)",
+}
+
+
+def schedule_key(name) -> str:
+    """A tag-safe key for a schedule name, e.g. "Oil Service" -> "oil_service"."""
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+class ServiceSchedule:
+    def __init__(
+        self, name, interval_hours=None, interval_kms=None, interval_months=None
+    ):
+        self.name = name
+        self.key = schedule_key(name)
+        self.interval_hours = interval_hours
+        self.interval_kms = interval_kms
+        self.interval_months = interval_months
+
+    @property
+    def prefix(self) -> str:
+        """Prefix for this schedule's tags, e.g. ``oil_service_next_service_est``."""
+        return f"{self.key}_"
+
+    @property
+    def reset_action(self) -> str:
+        """Name of the UI action that records this schedule's service."""
+        return f"reset_{self.key}_service"
+
+    def __repr__(self):
+        return (
+            f"ServiceSchedule({self.name!r}, {self.interval_hours!r}, "
+            f"{self.interval_kms!r}, {self.interval_months!r})"
+        )
+
+
+def parse_schedules(entries) -> list[ServiceSchedule]:
+    """
+    Schedules from the config's list of entries, either the loaded
+    ``ServiceScheduleConfig`` elements or plain dicts of their values.
+
+    Entries without a name, with a name that clashes with an earlier one, or
+    without any interval set are skipped.
+    """
+    schedules = []
+    seen = set()
+    for entry in entries or []:
+        entry = _entry_values(entry)
+        if entry is None:
+            continue
+
+        name = entry.get(NAME_FIELD)
+        key = schedule_key(name) if name else ""
+        if not key or key in seen:
+            continue
+
+        intervals = {
+            attr: _positive(entry.get(field)) for attr, field in INTERVAL_FIELDS.items()
+        }
+        if all(value is None for value in intervals.values()):
+            continue
+
+        seen.add(key)
+        schedules.append(ServiceSchedule(str(name), **intervals))
+    return schedules
+
+
+def _entry_values(entry) -> dict | None:
+    """An entry's values by exported key, or None if it isn't an entry."""
+    if isinstance(entry, dict):
+        return entry
+
+    # a loaded ServiceScheduleConfig, whose elements are its attributes
+    try:
+        return {
+            NAME_FIELD: _element_value(entry.schedule_name),
+            **{
+                field: _element_value(getattr(entry, attr))
+                for attr, field in INTERVAL_FIELDS.items()
+            },
+        }
+    except AttributeError:
+        return None
+
+
+def _element_value(element):
+    try:
+        return element.value
+    except ValueError:
+        # left out of the deployment config
+        return None
+
+
+def _positive(value):
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return None
+    return value if value > 0 else None
@@ -1,13 +1,16 @@
 from typing import Any
 
-from pydoover.cloud.processor import run_app
-
-from .application import MaintenanceManagerApplication
-from .app_config import MaintenanceManagerConfig
-
 
 def handler(event: dict[str, Any], context):
     """Lambda handler entry point."""
+    # Imported on first invocation rather than with the package, so the
+    # pydoover processor and UI stack only load when there's an event to
+    # handle, and the pure modules (forecast, usage, ...) import without it.
+    from pydoover.cloud.processor import run_app
+
+    from .application import MaintenanceManagerApplication
+    from .app_config import MaintenanceManagerConfig
+
     MaintenanceManagerConfig.clear_elements()
     run_app(
         MaintenanceManagerApplication(config=MaintenanceManagerConfig()),
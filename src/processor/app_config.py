@@ -1,7 +1,50 @@
 from pathlib import Path
 
 from pydoover import config
-from pydoover.cloud.processor import ManySubscriptionConfig
+from pydoover.cloud.processor import ManySubscriptionConfig, ScheduleConfig
+
+from maintenance_common import alerts
+
+
+class ServiceScheduleConfig(config.Object):
+    def __init__(self):
+        super().__init__("Service Schedule")
+        self.schedule_name = config.String(
+            "Name",
+            description="Shown in the UI and used to name the schedule's tags",
+        )
+        self.interval_hours = config.Number(
+            "Interval (hours)",
+            description="The target number of engine hours between services",
+            exclusive_minimum=0,
+            default=None,
+        )
+        self.interval_kms = config.Number(
+            "Interval (kms)",
+            description="The target number of kms between services",
+            exclusive_minimum=0,
+            default=None,
+        )
+        self.interval_months = config.Number(
+            "Interval (months)",
+            description="The target number of months between services",
+            exclusive_minimum=0,
+            default=None,
+        )
+
+
+class OptionalArray(config.Array):
+    """
+    An Array that can be left out of the deployment config, and loads as
+    empty. Arrays can't have a default, so would otherwise be required.
+    """
+
+    @property
+    def required(self):
+        return False
+
+    def load_data(self, data):
+        super().load_data(data if isinstance(data, list) else [])
 
 
 class MaintenanceManagerConfig(config.Schema):
@@ -31,6 +74,45 @@ class MaintenanceManagerConfig(config.Schema):
             exclusive_minimum=0,
             default=None,
         )
+        self.min_recompute_interval = config.Number(
+            "Min Recompute Interval (mins)",
+            description="Tracker messages arriving sooner than this after the last "
+            "forecast update are deferred to the next message or scheduled run, "
+            "unless the meters jumped. 0 recomputes on every message",
+            minimum=0,
+            default=0.0,
+        )
+        self.alert_days = config.Number(
+            "Alert Days Before Service",
+            description="Raise a due soon alert when a service is due within this "
+            "many days",
+            minimum=0,
+            default=alerts.DEFAULT_SOON_DAYS,
+        )
+        self.alert_hours = config.Number(
+            "Alert Hours Before Service",
+            description="Raise a due soon alert when a service is due within this "
+            "many engine hours",
+            minimum=0,
+            default=None,
+        )
+        self.alert_kms = config.Number(
+            "Alert Kms Before Service",
+            description="Raise a due soon alert when a service is due within this "
+            "many kms",
+            minimum=0,
+            default=None,
+        )
+        # added after the first release, so existing deployments don't have it
+        self.service_schedules = OptionalArray(
+            "Additional Service Schedules",
+            element=ServiceScheduleConfig(),
+            description="Further named schedules, such as a major service or an "
+            "annual inspection, forecast alongside the main service interval",
+        )
+        # optional: applies a reading deferred by the minimum recompute
+        # interval once a machine stops reporting
+        self.schedule = ScheduleConfig(default=None)
 
 
 def export():
@@ -1,22 +1,66 @@
 from pydoover import ui
 
+from maintenance_common.schedules import ServiceSchedule
+
 from .app_config import MaintenanceManagerConfig
 
 
+class ScheduleUI:
+    """The forecast and reset action for one additional service schedule."""
+
+    def __init__(self, schedule: ServiceSchedule):
+        key = schedule.key
+        self.next_service_est = ui.Timestamp(
+            f"{key}_nextServiceEst",
+            "Next Service Estimate",
+            icon="calendar-day",
+        )
+        self.hours_till_next_service = ui.NumericVariable(
+            f"{key}_hoursTillNextService",
+            "Hours To Next Service",
+            precision=1,
+            units="hrs",
+            icon="clock",
+            hidden=schedule.interval_hours is None,
+        )
+        self.kms_till_next_service = ui.NumericVariable(
+            f"{key}_kmsTillNextService",
+            "Kms Till Next Service",
+            precision=1,
+            units="km",
+            icon="road",
+            hidden=schedule.interval_kms is None,
+        )
+        self.container = ui.Container(
+            f"{key}_schedule",
+            schedule.name,
+            children=[
+                self.next_service_est,
+                self.kms_till_next_service,
+                self.hours_till_next_service,
+            ],
+        )
+
+        self.reset_service = ui.Action(
+            schedule.reset_action,
+            f"Set {schedule.name} Service Now",
+            requires_confirm=True,
+        )
+
+
 class MaintenanceManagerUI:
-    def __init__(self, config: MaintenanceManagerConfig):
+    def __init__(
+        self,
+        config: MaintenanceManagerConfig,
+        schedules: list[ServiceSchedule] = (),
+    ):
+        # shown relative to the viewer's clock, so unlike a count of days it
+        # doesn't go stale while the machine sends nothing to recompute it
         self.next_service_est = ui.Timestamp(
             "nextServiceEst",
             "Next Service Estimate",
             icon="calendar-day",
         )
-        self.days_till_next_service = ui.NumericVariable(
-            "daysTillNextService",
-            "Days To Next Service",
-            precision=0,
-            units="days",
-            icon="calendar",
-        )
         self.hours_till_next_service = ui.NumericVariable(
             "hoursTillNextService",
             "Hours To Next Service",
@@ -68,7 +112,6 @@ class MaintenanceManagerUI:
                 self.next_service_est,
                 self.kms_till_next_service,
                 self.hours_till_next_service,
-                self.days_till_next_service,
             ],
         )
 
@@ -112,8 +155,17 @@ class MaintenanceManagerUI:
             ],
         )
 
+        self.schedules = {s.key: ScheduleUI(s) for s in schedules}
+
         self.tabs = ui.TabContainer(
-            name="tabs", display_name="Tabs", children=[service_info, engine_info, last_service_info]
+            name="tabs",
+            display_name="Tabs",
+            children=[
+                service_info,
+                *(s.container for s in self.schedules.values()),
+                engine_info,
+                last_service_info,
+            ],
         )
 
         self.reset_service = ui.Action(
@@ -152,5 +204,6 @@ class MaintenanceManagerUI:
         return (
             self.tabs,
             self.reset_service,
+            *(s.reset_service for s in self.schedules.values()),
             self.config_submodule,
         )
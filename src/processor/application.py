@@ -1,63 +1,381 @@
+from __future__ import annotations
+
 import logging
-import math
 import time
 
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 
+# the base class and the callback decorators are needed to define the app;
+# pydoover.ui is already loaded by the Application base
 from pydoover.cloud.processor.application import Application
-from pydoover.cloud.processor.types import MessageCreateEvent
 from pydoover import ui
 
-from .app_config import MaintenanceManagerConfig
-from .app_ui import MaintenanceManagerUI
+from maintenance_common import alerts
+from maintenance_common.concurrency import gather_isolated
+from maintenance_common.metrics import InvocationMetrics
+from maintenance_common.schedules import parse_schedules
+
+from . import forecast, recompute
+from .dedup import ProcessedMessages, message_key
+from .replay import iter_api_readings, replay_async, to_ms
+from .resilience import CircuitBreaker, RetryBudget
+from .service_log import ServiceLog
+from .tag_session import TagSession
+from .usage import DailyUsage
+
+if TYPE_CHECKING:
+    from pydoover.cloud.processor.types import MessageCreateEvent
+
+    from .app_config import MaintenanceManagerConfig
 
 log = logging.getLogger(__name__)
 
 DEFAULT_AVE_CALC_DAYS = 14
 
+# Smallest change worth writing for each output tag. These match the
+# `precision` the values are displayed with in MaintenanceManagerUI, so a
+# skipped write never hides a visible change.
+OUTPUT_TOLERANCES = {
+    "next_service_est": 60 * 60 * 1000,  # ms; displayed as a date
+    "hours_due_est": 60 * 60 * 1000,
+    "kms_due_est": 60 * 60 * 1000,
+    "date_due": 60 * 60 * 1000,
+    "engine_hours": 0.1,
+    "hours_till_next_service": 0.1,
+    "machine_odometer": 0.1,
+    "kms_till_next_service": 0.1,
+    "ave_hours_per_day": 0.1,
+    "ave_kms_per_day": 0.1,
+}
+
+# Meter changes since the last computation that bypass the recompute
+# throttle, so a large jump (or a corrected meter) shows up straight away.
+RECOMPUTE_JUMP_HOURS = 1.0
+RECOMPUTE_JUMP_KMS = 20.0
+
+# Tags shown in the UI as-is, alongside the computed outputs
+DISPLAYED_INPUT_TAGS = ("last_service_date", "last_service_hours", "last_service_kms")
+
+# The history replay gets this long, and this many failed requests, across
+# all its pages and retries, before the invocation carries on without it. After repeated failures the device
+# stops trying for a while (see CircuitBreaker).
+HISTORY_BUDGET_S = 8.0
+HISTORY_ATTEMPTS = 3
+
+# output tags holding a timestamp, in epoch ms
+TIMESTAMP_TAGS = ("next_service_est", "hours_due_est", "kms_due_est", "date_due")
+
+# UI commands that affect the forecast
+FORECAST_UI_COMMANDS = ("setHours", "setKms", "aveCalcDays", "reset_service")
+
 
 class MaintenanceManagerApplication(Application):
     config: MaintenanceManagerConfig
 
     async def setup(self):
-        self.ui = MaintenanceManagerUI(self.config)
+        self.metrics = InvocationMetrics("maintenance_manager")
+        self.api = self.metrics.instrument(self.api)
+
+        # all tag reads and writes for this invocation go through one session
+        self.tag_session = TagSession(
+            self.api, self.agent_id, self.app_key, self._tag_values
+        )
+        self.schedules = parse_schedules(self.config.service_schedules.elements)
+        self.ui = None
+        # pressed actions to clear from ui_cmds, and alerts to publish, sent
+        # along with the tag flush
+        self._cleared_ui_cmds = {}
+        self._alerts = []
+        # prefixes of the schedules serviced by this invocation's commands
+        self._serviced = set()
+        self._processed = ProcessedMessages()
+
+    def _setup_ui(self):
+        """Build the UI, once we know this invocation will use it."""
+        if self.ui is not None:
+            return
+
+        # the UI's module is only loaded by the invocations that build it
+        from .app_ui import MaintenanceManagerUI
+
+        self.ui = MaintenanceManagerUI(self.config, self.schedules)
         self.ui_manager.add_children(*self.ui.fetch())
         self.ui_manager.set_position(self.config.position.value)
         self.ui_manager.register_interactions(self)
         self.ui_manager.register_callbacks(self)
 
     async def on_message_create(self, event: MessageCreateEvent):
-        if event.channel_name == "ui_cmds":
-            log.info(f"Handling ui_cmd: {event.message.data}")
+        self.metrics.set_property("channel", event.channel_name)
+        try:
+            await self._handle_message(event)
+        finally:
+            self.metrics.emit()
+
+    async def on_schedule(self, event):
+        self.metrics.set_property("channel", "schedule")
+        try:
+            await self._handle_schedule()
+        finally:
+            self.metrics.emit()
+
+    async def _handle_schedule(self):
+        """
+        Apply a tracker reading deferred by the minimum recompute interval, as
+        the trailing edge of that throttle, for a machine that has stopped
+        sending messages.
+
+        Alert levels that move with time alone are left to the dashboard's
+        fleet sweep, which covers every machine in one invocation.
+        """
+        if not self._has_deferred_reading():
+            return
+
+        log.info("Applying the tracker reading deferred by the recompute interval")
+        self.metrics.set_property("deferred_reading", True)
+        with self.metrics.span("ui_setup"):
+            self._setup_ui()
+        push_ui = await self._recompute(recompute.ALL_INPUTS)
+        await self._write_outputs(push_ui)
+
+    async def _handle_message(self, event: MessageCreateEvent):
+        with self.metrics.span("gate"):
+            repeat = self._check_delivery(event)
+            relevant = repeat is None and self._is_relevant(event)
+            throttled = relevant and self._is_throttled(event)
+
+        if repeat is not None:
+            log.info(f"Ignoring {repeat} message on {event.channel_name}")
+            self.metrics.set_property("skipped", repeat)
+            return
+
+        if not relevant:
+            log.debug(f"Ignoring message on {event.channel_name}: nothing to update")
+            self.metrics.set_property("skipped", "irrelevant")
+            return
+
+        if throttled:
+            # the tracker's aggregate keeps the reading, for the next message
+            # or scheduled run to apply
+            log.info("Deferring recompute: within minimum recompute interval")
+            self.metrics.set_property("skipped", "throttled")
+            return
+
+        try:
+            push_ui = await self._process_message(event)
+        except Exception:
+            # a half-computed forecast isn't published; the redelivery of the
+            # message recomputes it from the persisted tags
+            self._discard_outputs()
+            raise
+
+        # only once it has been processed, so a failed attempt is retried
+        self._mark_processed(event)
+        await self._write_outputs(push_ui)
+
+    def _discard_outputs(self):
+        """Drop this invocation's buffered writes."""
+        self.tag_session.discard()
+        self._cleared_ui_cmds = {}
+        self._alerts = []
+
+    async def _write_outputs(self, push_ui):
+        """Send this invocation's independent writes concurrently."""
+        writes = [self.metrics.timed("tag_flush", self.tag_session.flush())]
+        if self._cleared_ui_cmds:
+            cleared, self._cleared_ui_cmds = self._cleared_ui_cmds, {}
+            writes.append(
+                self.metrics.timed(
+                    "ui_cmds_clear",
+                    self.api.update_aggregate(
+                        self.agent_id,
+                        "ui_cmds",
+                        cleared,
+                        allow_invoking_channel=True,
+                    ),
+                )
+            )
+        if push_ui:
+            writes.append(self.metrics.timed("ui_push", self.ui_manager.push_async()))
+        alerts_to_send, self._alerts = self._alerts, []
+        for alert in alerts_to_send:
+            writes.append(
+                self.metrics.timed(
+                    "alert",
+                    self.api.create_message(self.agent_id, alerts.ALERT_CHANNEL, alert),
+                )
+            )
+
+        with self.metrics.span("writes"):
+            await gather_isolated(*writes)
+
+    async def _process_message(self, event: MessageCreateEvent) -> bool:
+        """Compute and buffer the outputs. Returns whether the UI needs a push."""
+        with self.metrics.span("ui_setup"):
+            self._setup_ui()
+
+        if event.channel_name != "ui_cmds":
+            return await self._recompute(recompute.ALL_INPUTS)
+
+        log.info(f"Handling ui_cmd: {event.message.data}")
+        with self.metrics.span("ui_cmds"):
             await self.ui_manager.on_command_update_async(None, event.message.data)
-            await self.ui_manager.push_async()
+            self._reset_schedules(event.message.data)
 
+        inputs = recompute.command_inputs(
+            self._ui_commands(event.message.data), self.app_key
+        )
+        await self._recompute(inputs)
+        # a command changes what the UI shows, whether or not the outputs moved
+        return True
+
+    async def _recompute(self, inputs) -> bool:
+        """
+        Recompute and buffer the outputs derived from the changed ``inputs``.
+        Returns whether the UI needs a push.
+        """
         # read tag values from the tracker app
         raw_run_hours = self.get_tracker_tag("run_hours", default=0)
         raw_odometer = self.get_tracker_tag("odometer_km", default=0)
 
         # ensure default tags exist on first run
-        await self._ensure_defaults(raw_run_hours, raw_odometer)
+        self._ensure_defaults(raw_run_hours, raw_odometer)
 
         # apply offsets
-        hours_offset = await self.get_tag("hours_offset")
-        odo_offset = await self.get_tag("odo_offset")
+        hours_offset = self.tag_session.get("hours_offset")
+        odo_offset = self.tag_session.get("odo_offset")
 
         engine_hours = raw_run_hours + hours_offset
         machine_odometer = raw_odometer + odo_offset
 
+        # only the outputs the changed inputs feed are recomputed, and the
+        # rest keep their published values
+        stale = self._stale_outputs(inputs)
+
         # compute average rates
-        ave_calc_days = self._get_ave_calc_days()
-        ave_rates = await self._get_average_rates(
-            raw_run_hours,
-            raw_odometer,
-            ave_calc_days,
-        )
+        if recompute.USAGE_RATES in stale[""]:
+            ave_calc_days = self._get_ave_calc_days()
+            with self.metrics.span("usage_rates"):
+                ave_rates = await self._get_average_rates(
+                    raw_run_hours,
+                    raw_odometer,
+                    ave_calc_days,
+                )
+        else:
+            ave_rates = self._last_known_rates()
+        ave_hours_per_day = ave_rates and ave_rates["run_hours"]
+        ave_kms_per_day = ave_rates and ave_rates["odometer"]
 
-        # read service parameters from tags (set by reset_service action)
-        last_service_hours = await self.get_tag("last_service_hours")
-        last_service_kms = await self.get_tag("last_service_kms")
-        last_service_date_ts = await self.get_tag("last_service_date")
+        # forecast the main interval and every additional schedule from the
+        # same meters and rates
+        now = datetime.now(tz=timezone.utc)
+        with self.metrics.span("forecast"):
+            service = self._forecast_service(
+                "",
+                self.config.service_interval_hours.value,
+                self.config.service_interval_kms.value,
+                self.config.service_interval_months.value,
+                now,
+                engine_hours,
+                machine_odometer,
+                ave_hours_per_day,
+                ave_kms_per_day,
+                stale[""],
+            )
+            schedule_services = {
+                schedule: self._forecast_service(
+                    schedule.prefix,
+                    schedule.interval_hours,
+                    schedule.interval_kms,
+                    schedule.interval_months,
+                    now,
+                    engine_hours,
+                    machine_odometer,
+                    ave_hours_per_day,
+                    ave_kms_per_day,
+                    stale[schedule.prefix],
+                )
+                for schedule in self.schedules
+            }
+
+        # update UI
+        self._update_service_ui(self.ui, service)
+        self.ui.ave_hours_per_day.update(ave_hours_per_day)
+        self.ui.ave_kms_per_day.update(ave_kms_per_day)
+        self.ui.engine_hours.update(engine_hours)
+        self.ui.machine_odometer.update(machine_odometer)
+
+        self.ui.last_service_date.update(service["last_service_date"])
+        self.ui.last_service_hours.update(service["last_service_hours"])
+        self.ui.last_service_kms.update(service["last_service_kms"])
+
+        for schedule, schedule_service in schedule_services.items():
+            self._update_service_ui(self.ui.schedules[schedule.key], schedule_service)
+
+        # save display values as tags, skipping any that haven't moved by more
+        # than the precision they are displayed with
+        outputs = {
+            **forecast.service_tags(service),
+            "ave_hours_per_day": ave_hours_per_day,
+            "ave_kms_per_day": ave_kms_per_day,
+        }
+        # a meter whose inputs haven't changed keeps its published value
+        if recompute.ENGINE_HOURS in stale[""]:
+            outputs["engine_hours"] = engine_hours
+        if recompute.MACHINE_ODOMETER in stale[""]:
+            outputs["machine_odometer"] = machine_odometer
+        changed = [
+            self.tag_session.set(key, value, tolerance=OUTPUT_TOLERANCES.get(key, 0))
+            for key, value in outputs.items()
+        ]
+        for schedule, schedule_service in schedule_services.items():
+            changed += [
+                self.tag_session.set(
+                    schedule.prefix + key,
+                    value,
+                    tolerance=OUTPUT_TOLERANCES.get(key, 0),
+                )
+                for key, value in forecast.service_tags(schedule_service).items()
+            ]
+        # the due timestamps are counted down from by consumers, so only
+        # record when they were projected if the projection moved
+        if any(changed):
+            self.tag_session.set("forecast_at", int(now.timestamp() * 1000))
+        self.tag_session.set("last_computed_at", int(time.time() * 1000))
+
+        self._update_alert_level("", "Service", service)
+        for schedule, schedule_service in schedule_services.items():
+            self._update_alert_level(schedule.prefix, schedule.name, schedule_service)
+
+        # every displayed value is backed by a tag, and none of them moves
+        # with time alone, so the UI only needs pushing if one of those is
+        # being written
+        pending = self.tag_session.pending
+        return any(changed) or any(key in pending for key in DISPLAYED_INPUT_TAGS)
+
+    def _forecast_service(
+        self,
+        prefix,
+        interval_hours,
+        interval_kms,
+        interval_months,
+        now,
+        engine_hours,
+        machine_odometer,
+        ave_hours_per_day,
+        ave_kms_per_day,
+        stale,
+    ):
+        """
+        Forecast the next service for the schedule with the given tag prefix.
+
+        Limits that aren't in ``stale`` keep their published values, and the
+        next service is the earliest of those and the recomputed ones.
+        """
+        # read service parameters from tags (set by the reset service actions)
+        last_service_hours = self.tag_session.get(f"{prefix}last_service_hours")
+        last_service_kms = self.tag_session.get(f"{prefix}last_service_kms")
+        last_service_date_ts = self.tag_session.get(f"{prefix}last_service_date")
 
         try:
             last_service_date = datetime.fromtimestamp(
@@ -66,93 +384,92 @@ class MaintenanceManagerApplication(Application):
         except (TypeError, ValueError, OSError):
             last_service_date = None
 
-        # compute next service thresholds
-        service_interval_hours = self.config.service_interval_hours.value
-        service_interval_kms = self.config.service_interval_kms.value
-        service_interval_months = self.config.service_interval_months.value
-
-        next_service_hours = None
-        if last_service_hours is not None and service_interval_hours is not None:
-            next_service_hours = last_service_hours + service_interval_hours
-
-        next_service_kms = None
-        if last_service_kms is not None and service_interval_kms is not None:
-            next_service_kms = last_service_kms + service_interval_kms
-
-        next_service_date = None
-        if last_service_date is not None and service_interval_months is not None:
-            interval = math.ceil(service_interval_months)
-            if interval > 0:
-                try:
-                    next_service_date = last_service_date + timedelta(
-                        days=interval * 30
-                    )
-                except Exception as e:
-                    log.error(f"Error calculating next service date: {e}")
-
-        # compute remaining
-        hours_till_next_service = None
-        if next_service_hours is not None and engine_hours is not None:
-            hours_till_next_service = next_service_hours - engine_hours
-
-        kms_till_next_service = None
-        if next_service_kms is not None and machine_odometer is not None:
-            kms_till_next_service = next_service_kms - machine_odometer
-
-        # compute next service estimate (earliest of date/hours/kms estimates)
-        next_service_est_dt = self._get_next_service_estimate(
+        service = forecast.forecast_service(
+            now,
             engine_hours,
             machine_odometer,
-            ave_rates and ave_rates["run_hours"],
-            ave_rates and ave_rates["odometer"],
-            next_service_hours,
-            next_service_kms,
-            next_service_date,
+            ave_hours_per_day,
+            ave_kms_per_day,
+            last_service_hours,
+            last_service_kms,
+            last_service_date,
+            interval_hours,
+            interval_kms,
+            interval_months,
         )
+        service["last_service_date"] = last_service_date
+        service["last_service_hours"] = last_service_hours
+        service["last_service_kms"] = last_service_kms
+
+        for output, keys in recompute.LIMIT_TAGS.items():
+            if output in stale:
+                continue
+            for key in keys:
+                value = self.tag_session.get(prefix + key)
+                if value is not None:
+                    service[key] = _from_ms(value) if key in TIMESTAMP_TAGS else value
+
+        service["next_service_est"] = forecast.earliest_due(
+            {
+                "hours": service["hours_due_est"],
+                "kms": service["kms_due_est"],
+                "date": service["date_due"],
+            }
+        )
+        service["days_till_next_service"] = forecast.days_until(
+            service["next_service_est"], now
+        )
+        return service
 
-        days_till_service_due = None
-        if next_service_est_dt is not None:
-            days_till_service_due = (
-                next_service_est_dt - datetime.now(tz=timezone.utc)
-            ).days
-
-        # update UI
-        self.ui.next_service_est.update(next_service_est_dt)
-        self.ui.ave_hours_per_day.update(ave_rates["run_hours"])
-        self.ui.ave_kms_per_day.update(ave_rates["odometer"])
-
-        if days_till_service_due is not None:
-            self.ui.days_till_next_service.update(int(days_till_service_due))
-        else:
-            self.ui.days_till_next_service.update(None)
+    def _stale_outputs(self, inputs) -> dict[str, set[str]]:
+        """The outputs that ``inputs`` feed, for each schedule's tag prefix."""
+        return {
+            prefix: recompute.affected(
+                inputs | {recompute.LAST_SERVICE}
+                if prefix in self._serviced
+                else inputs
+            )
+            for prefix in ("", *(schedule.prefix for schedule in self.schedules))
+        }
 
-        self.ui.engine_hours.update(engine_hours)
-        self.ui.hours_till_next_service.update(hours_till_next_service)
-        self.ui.machine_odometer.update(machine_odometer)
-        self.ui.kms_till_next_service.update(kms_till_next_service)
-
-        self.ui.last_service_date.update(last_service_date)
-        self.ui.last_service_hours.update(last_service_hours)
-        self.ui.last_service_kms.update(last_service_kms)
-
-        # save all display values as tags
-        await self.set_tag(
-            "next_service_est",
-            int(next_service_est_dt.timestamp() * 1000)
-            if next_service_est_dt is not None
-            else None,
+    def _update_alert_level(self, prefix, name, service):
+        """Queue an alert if the schedule's alert level has changed."""
+        level = alerts.alert_level(
+            service["days_till_next_service"],
+            service["hours_till_next_service"],
+            service["kms_till_next_service"],
+            self.config.alert_days.value,
+            self.config.alert_hours.value,
+            self.config.alert_kms.value,
         )
-        await self.set_tag(
-            "days_till_next_service",
-            int(days_till_service_due) if days_till_service_due is not None else None,
+        # no tag is the same as OK, so a healthy machine never writes one
+        previous = self.tag_session.get(f"{prefix}alert_level", default=alerts.OK)
+        if level == previous:
+            return
+
+        log.info(f"{name} alert level changed from {previous} to {level}")
+        self.tag_session.set(f"{prefix}alert_level", level)
+        self._alerts.append(
+            alerts.alert_message(
+                name,
+                level,
+                previous,
+                {
+                    key: service[key]
+                    for key in (
+                        "days_till_next_service",
+                        "hours_till_next_service",
+                        "kms_till_next_service",
+                    )
+                },
+            )
         )
-        await self.set_tag("engine_hours", engine_hours)
-        await self.set_tag("hours_till_next_service", hours_till_next_service)
-        await self.set_tag("machine_odometer", machine_odometer)
-        await self.set_tag("kms_till_next_service", kms_till_next_service)
 
-        # push UI changes
-        await self.ui_manager.push_async()
+    @staticmethod
+    def _update_service_ui(elements, service):
+        elements.next_service_est.update(service["next_service_est"])
+        elements.hours_till_next_service.update(service["hours_till_next_service"])
+        elements.kms_till_next_service.update(service["kms_till_next_service"])
 
     # --- UI Callbacks ---
 
@@ -165,12 +482,12 @@ class MaintenanceManagerApplication(Application):
         if raw_run_hours is None:
             return
 
-        current_offset = await self.get_tag("hours_offset", default=0) or 0
+        current_offset = self.tag_session.get("hours_offset", default=0)
         current_display = raw_run_hours + current_offset
         new_offset = new_value - current_display + current_offset
 
         log.info(f"Setting machine hours to {new_value} (offset: {new_offset})")
-        await self.set_tag("hours_offset", new_offset)
+        self.tag_session.set("hours_offset", new_offset)
         self.ui.set_hours.coerce(new_value)
 
     @ui.callback("setKms")
@@ -182,12 +499,12 @@ class MaintenanceManagerApplication(Application):
         if raw_odometer is None:
             return
 
-        current_offset = await self.get_tag("odo_offset", default=0)
+        current_offset = self.tag_session.get("odo_offset", default=0)
         current_display = raw_odometer + current_offset
         new_offset = new_value - current_display + current_offset
 
         log.info(f"Setting odometer to {new_value} (offset: {new_offset})")
-        await self.set_tag("odo_offset", new_offset)
+        self.tag_session.set("odo_offset", new_offset)
         self.ui.set_kms.coerce(new_value)
 
     @ui.callback("reset_service")
@@ -196,11 +513,39 @@ class MaintenanceManagerApplication(Application):
             log.info("Ignoring non-True button click.")
             return
 
+        self._record_service()
+
+        # safety check: this is OK because we check that the `reset_service` value is `True` at the start of the command.
+        self._cleared_ui_cmds[self.ui.reset_service.name] = None
+        self.ui.reset_service.coerce(None)
+
+    def _reset_schedules(self, data):
+        """Record a service for each additional schedule whose reset was pressed."""
+        commands = self._ui_commands(data)
+        for schedule in self.schedules:
+            if (
+                commands.get(schedule.reset_action) is not True
+                and commands.get(f"{self.app_key}_{schedule.reset_action}") is not True
+            ):
+                continue
+
+            log.info(f"Recording {schedule.name} service")
+            self._record_service(schedule.prefix)
+
+            # as for reset_service, this is OK because only `True` values are acted on
+            action = self.ui.schedules[schedule.key].reset_service
+            self._cleared_ui_cmds[action.name] = None
+            action.coerce(None)
+
+    # --- Helper methods ---
+
+    def _record_service(self, prefix=""):
+        """Record a service now, at the current engine hours and odometer."""
         raw_run_hours = self.get_tracker_tag("run_hours")
         raw_odometer = self.get_tracker_tag("odometer_km")
 
-        hours_offset = await self.get_tag("hours_offset", default=0)
-        odo_offset = await self.get_tag("odo_offset", default=0)
+        hours_offset = self.tag_session.get("hours_offset", default=0)
+        odo_offset = self.tag_session.get("odo_offset", default=0)
 
         engine_hours = (
             raw_run_hours + hours_offset if raw_run_hours is not None else None
@@ -214,39 +559,136 @@ class MaintenanceManagerApplication(Application):
         log.info(
             f"Recording service now: hours={engine_hours}, odo={machine_odometer}, date={now_ts}"
         )
-        await self.set_tag("last_service_date", now_ts)
+        self.tag_session.set(f"{prefix}last_service_date", now_ts)
         if engine_hours is not None:
-            await self.set_tag("last_service_hours", engine_hours)
+            self.tag_session.set(f"{prefix}last_service_hours", engine_hours)
         if machine_odometer is not None:
-            await self.set_tag("last_service_kms", machine_odometer)
-
-        # safety check: this is OK because we check that the `reset_service` value is `True` at the start of the command.
-        await self.api.update_aggregate(
-            self.agent_id,
-            "ui_cmds",
-            {self.ui.reset_service.name: None},
-            allow_invoking_channel=True,
-        )
-        self.ui.reset_service.coerce(None)
+            self.tag_session.set(f"{prefix}last_service_kms", machine_odometer)
 
-    # --- Helper methods ---
+        # keep the service in the schedule's history, which the last_service_*
+        # tags above overwrite
+        service_log = ServiceLog.from_tag(self.tag_session.get(f"{prefix}service_log"))
+        service_log.append(now_ts, engine_hours, machine_odometer)
+        self.tag_session.set(f"{prefix}service_log", service_log.to_tag())
+        self._serviced.add(prefix)
 
-    async def _ensure_defaults(self, raw_run_hours, raw_odometer):
+    def _ensure_defaults(self, raw_run_hours, raw_odometer):
         """Seed all tags with sensible defaults on first run."""
         now_ms = int(time.time() * 1000)
 
         defaults = {
             "hours_offset": 0,
             "odo_offset": 0,
-            "last_service_date": now_ms,
-            "last_service_hours": raw_run_hours,
-            "last_service_kms": raw_odometer,
         }
+        for prefix in ("", *(schedule.prefix for schedule in self.schedules)):
+            defaults[f"{prefix}last_service_date"] = now_ms
+            defaults[f"{prefix}last_service_hours"] = raw_run_hours
+            defaults[f"{prefix}last_service_kms"] = raw_odometer
 
         for key, default in defaults.items():
-            existing = await self.get_tag(key)
+            existing = self.tag_session.get(key)
             if existing is None and default is not None:
-                await self.set_tag(key, default)
+                self.tag_session.set(key, default)
+
+    def _check_delivery(self, event: MessageCreateEvent) -> str | None:
+        """
+        Why the message shouldn't be processed at all: "duplicate" if it has
+        been processed already, "out_of_order" if it's a tracker reading older
+        than one already used, otherwise None.
+        """
+        self._processed = ProcessedMessages.from_tag(
+            self.tag_session.get("processed_messages")
+        )
+        if message_key(event.message) in self._processed:
+            return "duplicate"
+        if event.channel_name == "tag_values" and self._processed.is_out_of_order(
+            to_ms(event.message.timestamp)
+        ):
+            return "out_of_order"
+        return None
+
+    def _mark_processed(self, event: MessageCreateEvent):
+        reading_ms = None
+        if event.channel_name == "tag_values":
+            reading_ms = to_ms(event.message.timestamp)
+        self._processed.add(message_key(event.message), reading_ms)
+        self.tag_session.set("processed_messages", self._processed.to_tag())
+
+    def _is_relevant(self, event: MessageCreateEvent) -> bool:
+        """Cheap check for whether a message could change the forecast."""
+        data = event.message.data
+        if not isinstance(data, dict):
+            return False
+
+        if event.channel_name == "ui_cmds":
+            commands = self._ui_commands(data)
+            reset_actions = [schedule.reset_action for schedule in self.schedules]
+            return any(
+                key in commands or f"{self.app_key}_{key}" in commands
+                for key in (*FORECAST_UI_COMMANDS, *reset_actions)
+            )
+
+        if event.channel_name != "tag_values":
+            return False
+
+        tracker_data = data.get(self.config.tracker_app_key.value)
+        if not isinstance(tracker_data, dict):
+            return False
+
+        if "run_hours" not in tracker_data and "odometer_km" not in tracker_data:
+            return False
+
+        return self._is_new_reading(
+            tracker_data.get("run_hours"), tracker_data.get("odometer_km")
+        )
+
+    def _has_deferred_reading(self) -> bool:
+        """Whether the tracker's latest reading hasn't been used yet."""
+        run_hours = self.get_tracker_tag("run_hours")
+        odometer_km = self.get_tracker_tag("odometer_km")
+        if run_hours is None and odometer_km is None:
+            return False
+        return self._is_new_reading(run_hours, odometer_km)
+
+    def _is_new_reading(self, run_hours, odometer_km) -> bool:
+        """Whether either meter has moved from the last reading used. None is unread."""
+        last_reading = DailyUsage.peek_last(self.tag_session.get("daily_usage"))
+        if last_reading is None:
+            return True
+
+        _, last_hours, last_kms = last_reading
+        return (run_hours is not None and run_hours != last_hours) or (
+            odometer_km is not None and odometer_km != last_kms
+        )
+
+    def _ui_commands(self, data):
+        commands = data.get(self.app_key)
+        return commands if isinstance(commands, dict) else data
+
+    def _is_throttled(self, event: MessageCreateEvent) -> bool:
+        """Whether this message arrived too soon after the last computation to recompute."""
+        if event.channel_name == "ui_cmds":
+            return False
+
+        interval_mins = self.config.min_recompute_interval.value
+        last_computed = self.tag_session.get("last_computed_at")
+        if not interval_mins or last_computed is None:
+            return False
+
+        if time.time() * 1000 - last_computed >= interval_mins * 60 * 1000:
+            return False
+
+        last_reading = DailyUsage.peek_last(self.tag_session.get("daily_usage"))
+        if last_reading is None:
+            return False
+
+        _, last_hours, last_kms = last_reading
+        hours = self.get_tracker_tag("run_hours")
+        kms = self.get_tracker_tag("odometer_km")
+        return not (
+            _exceeds(hours, last_hours, RECOMPUTE_JUMP_HOURS)
+            or _exceeds(kms, last_kms, RECOMPUTE_JUMP_KMS)
+        )
 
     def get_tracker_tag(self, key, default=None):
         try:
@@ -258,93 +700,78 @@ class MaintenanceManagerApplication(Application):
         val = self.ui.ave_calc_days.current_value
         return val if val is not None else DEFAULT_AVE_CALC_DAYS
 
-    def _get_next_service_estimate(
-        self,
-        curr_hours,
-        curr_odo,
-        ave_hours_per_day,
-        ave_kms_per_day,
-        next_service_hours,
-        next_service_kms,
-        next_service_date,
-    ):
-        estimates = []
-        now = datetime.now(tz=timezone.utc)
-
-        if (
-            curr_hours is not None
-            and ave_hours_per_day is not None
-            and ave_hours_per_day > 0
-            and next_service_hours is not None
-        ):
-            hours_remaining = next_service_hours - curr_hours
-            days_remaining = hours_remaining / ave_hours_per_day
-            estimates.append(now + timedelta(days=days_remaining))
-
-        if (
-            curr_odo is not None
-            and ave_kms_per_day is not None
-            and ave_kms_per_day > 0
-            and next_service_kms is not None
-        ):
-            kms_remaining = next_service_kms - curr_odo
-            days_remaining = kms_remaining / ave_kms_per_day
-            estimates.append(now + timedelta(days=days_remaining))
-
-        if next_service_date is not None:
-            estimates.append(next_service_date)
-
-        if estimates:
-            return min(estimates)
-        return None
-
     async def _get_average_rates(self, raw_run_hours, raw_odometer, window_days):
+        now_ms = int(time.time() * 1000)
+        usage = DailyUsage.from_tag(self.tag_session.get("daily_usage"))
+
+        # the channel history is only replayed to seed the store on first run,
+        # or to retry a replay that failed
+        if usage.is_empty or self.tag_session.get("history_breaker") is not None:
+            replayed = await self._replay_history(now_ms, window_days)
+            if replayed is not None:
+                usage = replayed
+
+        usage.record(now_ms, raw_run_hours, raw_odometer)
+        self.tag_session.set("daily_usage", usage.to_tag())
+
+        rates = usage.average_rates(now_ms, window_days)
+        if rates is None:
+            # e.g. while the history is unavailable, keep forecasting from the
+            # last rates we had
+            rates = self._last_known_rates()
+        return rates
+
+    async def _replay_history(self, now_ms, window_days):
+        """
+        Rebuild daily usage from the tracker's readings within the window.
+
+        Returns None if the history couldn't be fetched, in which case the
+        replay is retried on later invocations, unless the circuit breaker
+        has opened.
+        """
+        breaker = CircuitBreaker.from_tag(self.tag_session.get("history_breaker"))
+        if not breaker.allow(now_ms):
+            log.warning("Skipping history replay: circuit breaker is open")
+            self.metrics.set_property("history", "circuit_open")
+            return None
+
         tracker_key = self.config.tracker_app_key.value
         start_date = datetime.now(tz=timezone.utc) - timedelta(days=window_days)
-
-        hours_per_day = 0
-        kms_per_day = 0
+        budget = RetryBudget(HISTORY_BUDGET_S, attempts=HISTORY_ATTEMPTS)
+        readings = iter_api_readings(
+            self.api, self.agent_id, tracker_key, start_date, call=budget.call
+        )
 
         try:
-            messages = await self.api.get_channel_messages(
-                agent_id=self.agent_id,
-                channel_name="tag_values",
-                after=start_date,
-                # before=datetime.now(tz=timezone.utc),
-                limit=1,
-                field_names=[f"{tracker_key}.run_hours", f"{tracker_key}.odometer_km"],
-            )
+            usage = await replay_async(readings)
         except Exception as e:
-            log.error(f"Error fetching tag_values messages: {e}")
-            return None
-
-        if not messages:
+            log.error(f"Error replaying tag_values history: {e!r}")
+            self.metrics.set_property("history", "failed")
+            breaker.record_failure(now_ms)
+            self.tag_session.set("history_breaker", breaker.to_tag())
             return None
 
-        msg = messages[0]
-        msg_data = msg.data or {}
-        tracker_data = msg_data.get(tracker_key, {})
-
-        old_hours = tracker_data.get("run_hours")
-        old_odo = tracker_data.get("odometer_km")
+        log.info(f"Replayed tag_values history into daily usage: {usage.last}")
+        # a device that has never failed has no breaker tag
+        self.tag_session.set("history_breaker", None)
+        return usage
 
-        elapsed = datetime.now(tz=timezone.utc) - msg.timestamp
+    def _last_known_rates(self):
+        hours = self.tag_session.get("ave_hours_per_day")
+        kms = self.tag_session.get("ave_kms_per_day")
+        if hours is None and kms is None:
+            return None
+        return {"run_hours": hours, "odometer": kms}
 
-        log.info(
-            f"Early data: {tracker_data}. Current data: ({raw_run_hours, raw_odometer}). Elapsed: {elapsed}"
-        )
 
-        if old_hours is not None and raw_run_hours is not None:
-            hours_per_day = (
-                (raw_run_hours - old_hours) / elapsed.total_seconds() * (24 * 60 * 60)
-            )
+def _from_ms(value):
+    try:
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    except (TypeError, ValueError, OSError):
+        return None
 
-        if old_odo is not None and raw_odometer is not None:
-            kms_per_day = (
-                (raw_odometer - old_odo) / elapsed.total_seconds() * (24 * 60 * 60)
-            )
 
-        return {
-            "run_hours": hours_per_day,
-            "odometer": kms_per_day,
-        }
+def _exceeds(value, reference, threshold):
+    if value is None or reference is None:
+        return False
+    return abs(value - reference) >= threshold
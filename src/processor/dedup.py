@@ -0,0 +1,73 @@
+"""
+Suppression of redelivered and out-of-order messages.
+
+Events are delivered at least once, and a retry after a timeout would
+otherwise run the whole pipeline again. The manager keeps the keys of the
+messages it has recently processed, and the time of the newest tracker
+reading it has used, in a single tag. A message already in the window is
+dropped straight away, as is a tracker reading older than one already used,
+which would otherwise overwrite newer results.
+"""
+
+from .replay import to_ms
+
+# messages remembered, which only needs to cover how far back a redelivery
+# can arrive, not the device's whole history
+WINDOW_SIZE = 32
+
+
+def message_key(message) -> str | None:
+    """A key for a message from its ID and timestamp, or None without an ID."""
+    message_id = getattr(message, "id", None)
+    if message_id is None:
+        return None
+    return f"{message_id}:{to_ms(getattr(message, 'timestamp', None))}"
+
+
+class ProcessedMessages:
+    """
+    The last :data:`WINDOW_SIZE` messages processed, oldest first.
+
+    Persisted as ``{"keys": [<message key>...], "reading_at": <ts ms>}``,
+    where ``reading_at`` is the timestamp of the newest tracker reading used.
+    """
+
+    def __init__(self, keys=None, reading_at=None):
+        self.keys: list[str] = list(keys or [])
+        self.reading_at: int | None = reading_at
+
+    @classmethod
+    def from_tag(cls, value):
+        if not isinstance(value, dict):
+            return cls()
+        keys = value.get("keys")
+        reading_at = value.get("reading_at")
+        return cls(
+            [str(key) for key in keys] if isinstance(keys, list) else None,
+            reading_at if isinstance(reading_at, int) else None,
+        )
+
+    def to_tag(self):
+        return {"keys": list(self.keys), "reading_at": self.reading_at}
+
+    def __contains__(self, key):
+        return key is not None and key in self.keys
+
+    def is_out_of_order(self, reading_ms) -> bool:
+        """Whether a reading is older than the newest one already used."""
+        return (
+            reading_ms is not None
+            and self.reading_at is not None
+            and reading_ms < self.reading_at
+        )
+
+    def add(self, key, reading_ms=None):
+        """Remember a processed message, and the time of its reading if it had one."""
+        if key is not None:
+            if key in self.keys:
+                self.keys.remove(key)
+            self.keys.append(key)
+            del self.keys[:-WINDOW_SIZE]
+
+        if reading_ms is not None and not self.is_out_of_order(reading_ms):
+            self.reading_at = reading_ms
@@ -0,0 +1,294 @@
+"""
+Service forecasting, independent of the processor runtime.
+
+Given a machine's meters, usage rates, last service and service intervals,
+these work out when the next service is due. :func:`estimate_next_service`
+handles one machine with datetimes; :func:`estimate_next_service_batch` does
+the same for whole fleets at once with NumPy arrays.
+"""
+
+import math
+
+from datetime import datetime, timedelta, timezone
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# the range a projected due date can be represented in, in epoch ms
+MIN_MS = int(datetime.min.replace(tzinfo=timezone.utc).timestamp() * 1000)
+MAX_MS = int(datetime.max.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+# month-based intervals are counted in whole 30 day months
+DAYS_PER_MONTH = 30
+
+
+def service_interval_days(interval_months):
+    """A month-based service interval in days, or None if it isn't set."""
+    if interval_months is None:
+        return None
+    months = math.ceil(interval_months)
+    return months * DAYS_PER_MONTH if months > 0 else None
+
+
+def next_service_thresholds(
+    last_service_hours,
+    last_service_kms,
+    last_service_date: datetime | None,
+    interval_hours,
+    interval_kms,
+    interval_months,
+):
+    """The engine hours, odometer and date at which the next service is due."""
+    next_service_hours = None
+    if last_service_hours is not None and interval_hours is not None:
+        next_service_hours = last_service_hours + interval_hours
+
+    next_service_kms = None
+    if last_service_kms is not None and interval_kms is not None:
+        next_service_kms = last_service_kms + interval_kms
+
+    next_service_date = None
+    interval_days = service_interval_days(interval_months)
+    if last_service_date is not None and interval_days is not None:
+        try:
+            next_service_date = last_service_date + timedelta(days=interval_days)
+        except OverflowError:
+            pass
+
+    return next_service_hours, next_service_kms, next_service_date
+
+
+def remaining(threshold, current):
+    """How far ``current`` is from ``threshold``, or None if either is unknown."""
+    if threshold is None or current is None:
+        return None
+    return threshold - current
+
+
+def due_dates(
+    now: datetime,
+    curr_hours,
+    curr_odo,
+    ave_hours_per_day,
+    ave_kms_per_day,
+    next_service_hours,
+    next_service_kms,
+    next_service_date: datetime | None,
+) -> dict[str, datetime | None]:
+    """
+    When each limit is projected to fall due, keyed by ``hours``, ``kms`` and
+    ``date``, or None for a limit with nothing to project from.
+
+    These don't move as time passes, only when the meters, usage rates or
+    thresholds change, so consumers can count down to them locally.
+    """
+    due = {"hours": None, "kms": None, "date": next_service_date}
+
+    if (
+        curr_hours is not None
+        and ave_hours_per_day is not None
+        and ave_hours_per_day > 0
+        and next_service_hours is not None
+    ):
+        due["hours"] = _project(now, next_service_hours - curr_hours, ave_hours_per_day)
+
+    if (
+        curr_odo is not None
+        and ave_kms_per_day is not None
+        and ave_kms_per_day > 0
+        and next_service_kms is not None
+    ):
+        due["kms"] = _project(now, next_service_kms - curr_odo, ave_kms_per_day)
+
+    return due
+
+
+def _project(now, remaining, rate_per_day):
+    """
+    When ``remaining`` runs out at ``rate_per_day``, or None if that is too far
+    off to represent, as for a machine that has barely moved.
+    """
+    try:
+        return now + timedelta(days=remaining / rate_per_day)
+    except OverflowError:
+        return None
+
+
+def estimate_next_service(
+    now: datetime,
+    curr_hours,
+    curr_odo,
+    ave_hours_per_day,
+    ave_kms_per_day,
+    next_service_hours,
+    next_service_kms,
+    next_service_date: datetime | None,
+) -> datetime | None:
+    """The earliest of the hours, kms and date based service estimates."""
+    due = due_dates(
+        now,
+        curr_hours,
+        curr_odo,
+        ave_hours_per_day,
+        ave_kms_per_day,
+        next_service_hours,
+        next_service_kms,
+        next_service_date,
+    )
+    return earliest_due(due)
+
+
+def forecast_service(
+    now: datetime,
+    curr_hours,
+    curr_odo,
+    ave_hours_per_day,
+    ave_kms_per_day,
+    last_service_hours,
+    last_service_kms,
+    last_service_date: datetime | None,
+    interval_hours,
+    interval_kms,
+    interval_months,
+) -> dict:
+    """
+    One schedule's forecast: its thresholds, when each limit falls due, how
+    far the meters are from their limits, and the earliest due date as
+    ``next_service_est``.
+    """
+    next_service_hours, next_service_kms, next_service_date = next_service_thresholds(
+        last_service_hours,
+        last_service_kms,
+        last_service_date,
+        interval_hours,
+        interval_kms,
+        interval_months,
+    )
+    due = due_dates(
+        now,
+        curr_hours,
+        curr_odo,
+        ave_hours_per_day,
+        ave_kms_per_day,
+        next_service_hours,
+        next_service_kms,
+        next_service_date,
+    )
+    return {
+        "hours_due_est": due["hours"],
+        "kms_due_est": due["kms"],
+        "date_due": due["date"],
+        "next_service_est": earliest_due(due),
+        "next_service_hours": next_service_hours,
+        "next_service_kms": next_service_kms,
+        "hours_till_next_service": remaining(next_service_hours, curr_hours),
+        "kms_till_next_service": remaining(next_service_kms, curr_odo),
+    }
+
+
+def service_tags(service) -> dict:
+    """
+    A :func:`forecast_service` result as the values of its output tags.
+
+    None of these move just because time passes: the due dates are
+    timestamps to count down to, rather than a count of days that would need
+    rewriting every day. ``days_till_next_service`` was such a count, and is
+    cleared from devices that still have it.
+    """
+    return {
+        "next_service_est": _to_ms(service["next_service_est"]),
+        "hours_due_est": _to_ms(service["hours_due_est"]),
+        "kms_due_est": _to_ms(service["kms_due_est"]),
+        "date_due": _to_ms(service["date_due"]),
+        "next_service_hours": service["next_service_hours"],
+        "next_service_kms": service["next_service_kms"],
+        "hours_till_next_service": service["hours_till_next_service"],
+        "kms_till_next_service": service["kms_till_next_service"],
+        "days_till_next_service": None,
+    }
+
+
+def _to_ms(when):
+    return int(when.timestamp() * 1000) if when is not None else None
+
+
+def earliest_due(due: dict[str, datetime | None]) -> datetime | None:
+    """The first of the :func:`due_dates`, or None if none are known."""
+    estimates = [when for when in due.values() if when is not None]
+    return min(estimates) if estimates else None
+
+
+def days_until(when: datetime | None, now: datetime):
+    """Whole days from ``now`` until ``when``."""
+    if when is None:
+        return None
+    return (when - now).days
+
+
+def estimate_next_service_batch(
+    now_ms,
+    curr_hours,
+    curr_odo,
+    ave_hours_per_day,
+    ave_kms_per_day,
+    last_service_hours,
+    last_service_kms,
+    last_service_date_ms,
+    interval_hours,
+    interval_kms,
+    interval_months,
+):
+    """
+    Vectorised :func:`estimate_next_service` for many machines at once.
+
+    Every argument is an array (or a scalar, broadcast across the fleet) with
+    NaN standing in for an unknown value or an unset interval. Timestamps are
+    epoch milliseconds. Returns an array of estimated due timestamps in epoch
+    milliseconds, NaN where there is nothing to estimate from.
+
+    Requires NumPy, which is not a runtime dependency of the Lambda: install
+    the ``batch`` extra.
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError(
+            "estimate_next_service_batch requires numpy: install "
+            "maintenance-manager[batch]"
+        ) from e
+
+    def arr(value):
+        return np.asarray(value, dtype=np.float64)
+
+    curr_hours, curr_odo = arr(curr_hours), arr(curr_odo)
+    hours_rate, kms_rate = arr(ave_hours_per_day), arr(ave_kms_per_day)
+    interval_months = arr(interval_months)
+
+    next_hours = arr(last_service_hours) + arr(interval_hours)
+    next_kms = arr(last_service_kms) + arr(interval_kms)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hours_days = np.where(
+            hours_rate > 0, (next_hours - curr_hours) / hours_rate, np.nan
+        )
+        kms_days = np.where(kms_rate > 0, (next_kms - curr_odo) / kms_rate, np.nan)
+
+        months = np.ceil(interval_months)
+        date_due = np.where(
+            months > 0,
+            arr(last_service_date_ms) + months * DAYS_PER_MONTH * DAY_MS,
+            np.nan,
+        )
+
+    def in_range(ms):
+        # like the single machine estimate, a date too far off to represent
+        # is left out rather than taken as the estimate
+        with np.errstate(invalid="ignore"):
+            return np.where((ms >= MIN_MS) & (ms <= MAX_MS), ms, np.nan)
+
+    now_ms = arr(now_ms)
+    return np.fmin(
+        np.fmin(
+            in_range(now_ms + hours_days * DAY_MS), in_range(now_ms + kms_days * DAY_MS)
+        ),
+        in_range(date_due),
+    )
@@ -0,0 +1,76 @@
+"""
+Which outputs a message can change.
+
+The forecast's outputs are derived from a handful of inputs: the meter
+offsets, the raw meters, the usage rates' averaging window, the last service
+and the service intervals. A tracker message can change any of them, but a
+UI command only changes one, e.g. ``setKms`` only moves the odometer offset.
+:func:`affected` follows :data:`DEPENDENCIES` from the changed inputs to the
+outputs that need recomputing, so a command doesn't query usage rates or
+rewrite outputs that can't have moved.
+"""
+
+# inputs
+HOURS_OFFSET = "hours_offset"
+ODO_OFFSET = "odo_offset"
+METERS = "meters"
+RATES_WINDOW = "rates_window"
+LAST_SERVICE = "last_service"
+INTERVALS = "intervals"
+
+ALL_INPUTS = frozenset(
+    {HOURS_OFFSET, ODO_OFFSET, METERS, RATES_WINDOW, LAST_SERVICE, INTERVALS}
+)
+
+# outputs
+ENGINE_HOURS = "engine_hours"
+MACHINE_ODOMETER = "machine_odometer"
+USAGE_RATES = "usage_rates"
+HOURS_DUE = "hours_due"
+KMS_DUE = "kms_due"
+DATE_DUE = "date_due"
+NEXT_SERVICE = "next_service"
+
+# what each output is derived from, inputs or earlier outputs, in an order
+# where every output comes after the outputs it depends on
+DEPENDENCIES = {
+    ENGINE_HOURS: {HOURS_OFFSET, METERS},
+    MACHINE_ODOMETER: {ODO_OFFSET, METERS},
+    USAGE_RATES: {METERS, RATES_WINDOW},
+    HOURS_DUE: {ENGINE_HOURS, USAGE_RATES, LAST_SERVICE, INTERVALS},
+    KMS_DUE: {MACHINE_ODOMETER, USAGE_RATES, LAST_SERVICE, INTERVALS},
+    DATE_DUE: {LAST_SERVICE, INTERVALS},
+    NEXT_SERVICE: {HOURS_DUE, KMS_DUE, DATE_DUE},
+}
+
+# each service limit's output tags, without the schedule prefix
+LIMIT_TAGS = {
+    HOURS_DUE: ("hours_due_est", "next_service_hours", "hours_till_next_service"),
+    KMS_DUE: ("kms_due_est", "next_service_kms", "kms_till_next_service"),
+    DATE_DUE: ("date_due",),
+}
+
+# the inputs each UI command changes; the service resets are recorded per
+# schedule, so they're added by the caller
+COMMAND_INPUTS = {
+    "setHours": {HOURS_OFFSET},
+    "setKms": {ODO_OFFSET},
+    "aveCalcDays": {RATES_WINDOW},
+}
+
+
+def affected(changed_inputs) -> set[str]:
+    """The outputs derived, directly or through other outputs, from the inputs."""
+    stale = set()
+    for output, sources in DEPENDENCIES.items():
+        if not sources.isdisjoint(changed_inputs) or not sources.isdisjoint(stale):
+            stale.add(output)
+    return stale
+
+
+def command_inputs(commands, app_key) -> set[str]:
+    """The inputs changed by a ui_cmds message's commands."""
+    inputs = set()
+    for name in commands:
+        inputs |= COMMAND_INPUTS.get(name.removeprefix(f"{app_key}_"), set())
+    return inputs
@@ -0,0 +1,361 @@
+"""
+Replay of a device's archived tracker history.
+
+Rebuilds the :class:`~processor.usage.DailyUsage` store from past
+``tag_values`` messages, so a newly onboarded machine's averages are right
+straight away instead of after weeks of live messages. History can be paged
+from the API or read from a local JSONL export (one message per line, with a
+``timestamp`` and ``data``). Readings are streamed one at a time into a store
+of bounded size, so memory use doesn't grow with the length of the history.
+
+Run ``replay-history <export.jsonl>`` to rebuild the usage tags from an export
+and print them as a single ``tag_values`` update, or ``replay-history
+--agent-id <id>`` to replay a device's history from the API and write its
+final tags, forecast included, in one aggregate update.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+
+from collections.abc import AsyncIterator, Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+
+from maintenance_common.schedules import parse_schedules
+
+from . import forecast
+from .usage import DailyUsage
+
+PAGE_SIZE = 1000
+
+DEFAULT_API_URL = "https://data.doover.com/api"
+
+# the manager's settings in its deployment config, as exported to
+# doover_config.json
+INTERVAL_SETTINGS = (
+    "service_interval_(hours)",
+    "service_interval_(kms)",
+    "service_interval_(months)",
+)
+SCHEDULES_SETTING = "additional_service_schedules"
+
+Reading = tuple[int, float | None, float | None]
+
+
+def to_ms(timestamp) -> int | None:
+    """Epoch milliseconds from a datetime, an ISO 8601 string or epoch ms."""
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return int(timestamp.timestamp() * 1000)
+    if isinstance(timestamp, int | float) and not isinstance(timestamp, bool):
+        return int(timestamp)
+    return None
+
+
+def message_reading(timestamp, data, tracker_key) -> Reading | None:
+    """The tracker's meter reading from one ``tag_values`` message, if it has one."""
+    ts_ms = to_ms(timestamp)
+    if ts_ms is None or not isinstance(data, dict):
+        return None
+
+    tracker_data = data.get(tracker_key)
+    if not isinstance(tracker_data, dict):
+        return None
+
+    run_hours = tracker_data.get("run_hours")
+    odometer_km = tracker_data.get("odometer_km")
+    if run_hours is None and odometer_km is None:
+        return None
+    return ts_ms, run_hours, odometer_km
+
+
+async def iter_api_readings(
+    api, agent_id, tracker_key, after: datetime, page_size=PAGE_SIZE, call=None
+) -> AsyncIterator[Reading]:
+    """
+    Stream a device's tracker readings since ``after``, a page at a time.
+
+    ``call``, if given, makes each page request. It is passed a function
+    returning the request's coroutine, like ``RetryBudget.call`` expects.
+    """
+    field_names = [f"{tracker_key}.run_hours", f"{tracker_key}.odometer_km"]
+    while True:
+        request = functools.partial(
+            api.get_channel_messages,
+            agent_id=agent_id,
+            channel_name="tag_values",
+            after=after,
+            limit=page_size,
+            field_names=field_names,
+        )
+        page = await (call(request) if call is not None else request())
+
+        # keep just the readings, and let go of the decoded messages before
+        # the next page is fetched so only one page is ever held at a time
+        readings = [
+            message_reading(message.timestamp, message.data, tracker_key)
+            for message in page
+        ]
+        full_page = len(page) >= page_size
+        last_timestamp = page[-1].timestamp if page else None
+        del page
+
+        for reading in readings:
+            if reading is not None:
+                yield reading
+
+        if not full_page:
+            return
+
+        next_after = last_timestamp + timedelta(milliseconds=1)
+        if next_after <= after:
+            # a page that doesn't move forward would repeat forever
+            return
+        after = next_after
+
+
+def iter_file_readings(path, tracker_key) -> Iterator[Reading]:
+    """Stream the tracker readings from a JSONL export of ``tag_values`` messages."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            message = json.loads(line)
+            reading = message_reading(
+                message.get("timestamp"), message.get("data"), tracker_key
+            )
+            if reading is not None:
+                yield reading
+
+
+def replay(readings: Iterable[Reading], usage: DailyUsage | None = None):
+    """Record each reading into ``usage`` (or a new store) and return it."""
+    usage = usage if usage is not None else DailyUsage()
+    for reading in readings:
+        usage.record(*reading)
+    return usage
+
+
+async def replay_async(readings: AsyncIterator[Reading], usage=None):
+    """:func:`replay` for readings streamed from the API."""
+    usage = usage if usage is not None else DailyUsage()
+    async for reading in readings:
+        usage.record(*reading)
+    return usage
+
+
+def usage_tags(usage: DailyUsage, window_days):
+    """The usage store and the average rates at its last reading, as tags."""
+    tags = {"daily_usage": usage.to_tag()}
+    if usage.is_empty:
+        return tags
+
+    rates = usage.average_rates(usage.last[0], window_days)
+    if rates is not None:
+        tags["ave_hours_per_day"] = rates["run_hours"]
+        tags["ave_kms_per_day"] = rates["odometer"]
+    return tags
+
+
+def final_tags(usage: DailyUsage, window_days, manager_tags, app_config, now):
+    """
+    The manager's tags after a replay: the usage tags, the meters at the last
+    reading, and the forecast for the main interval and every additional
+    schedule.
+
+    ``manager_tags`` are the device's current manager tags, for the meter
+    offsets and last services, and ``app_config`` its manager's deployment
+    config, for the intervals.
+    """
+    tags = usage_tags(usage, window_days)
+    if usage.is_empty:
+        return tags
+
+    _, run_hours, odometer_km = usage.last
+    engine_hours = _offset(run_hours, manager_tags.get("hours_offset"))
+    machine_odometer = _offset(odometer_km, manager_tags.get("odo_offset"))
+    tags["engine_hours"] = engine_hours
+    tags["machine_odometer"] = machine_odometer
+
+    intervals = [
+        ("", *(app_config.get(setting) for setting in INTERVAL_SETTINGS)),
+        *(
+            (s.prefix, s.interval_hours, s.interval_kms, s.interval_months)
+            for s in parse_schedules(app_config.get(SCHEDULES_SETTING))
+        ),
+    ]
+    for prefix, interval_hours, interval_kms, interval_months in intervals:
+        last_service_date = manager_tags.get(f"{prefix}last_service_date")
+        service = forecast.forecast_service(
+            now,
+            engine_hours,
+            machine_odometer,
+            tags.get("ave_hours_per_day"),
+            tags.get("ave_kms_per_day"),
+            manager_tags.get(f"{prefix}last_service_hours"),
+            manager_tags.get(f"{prefix}last_service_kms"),
+            _from_ms(last_service_date),
+            interval_hours,
+            interval_kms,
+            interval_months,
+        )
+        for key, value in forecast.service_tags(service).items():
+            tags[prefix + key] = value
+    return tags
+
+
+async def backfill(
+    api,
+    agent_id,
+    app_key,
+    tracker_key,
+    window_days,
+    after: datetime,
+    export=None,
+    dry_run=False,
+):
+    """
+    Replay a device's history, from ``export`` or else the API, and apply its
+    final manager tags as a single ``tag_values`` update.
+
+    Returns the update, or None if there were no readings to replay. With
+    ``dry_run``, the update is only returned.
+    """
+    if export is not None:
+        usage = replay(iter_file_readings(export, tracker_key))
+    else:
+        usage = await replay_async(iter_api_readings(api, agent_id, tracker_key, after))
+    if usage.is_empty:
+        return None
+
+    tag_values = await api.fetch_channel_aggregate(agent_id, "tag_values")
+    deployment_config = await api.fetch_channel_aggregate(agent_id, "deployment_config")
+    update = {
+        app_key: final_tags(
+            usage,
+            window_days,
+            _section(tag_values, app_key),
+            _section(_section(deployment_config, "applications"), app_key),
+            datetime.now(tz=timezone.utc),
+        )
+    }
+    if not dry_run:
+        await api.update_aggregate(agent_id, "tag_values", update)
+    return update
+
+
+async def _backfill_from_api(args):
+    # only the API mode needs pydoover; the file mode runs without it
+    from pydoover.cloud.processor.data_client import ProcessorDataClient
+
+    api = ProcessorDataClient(args.api_url)
+    await api.setup()
+    api.set_token(args.token)
+    try:
+        return await backfill(
+            api,
+            args.agent_id,
+            args.app_key,
+            args.tracker_key,
+            args.window_days,
+            args.since,
+            export=args.export,
+            dry_run=args.dry_run,
+        )
+    finally:
+        await api.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rebuild a device's usage tags from its tag_values history."
+    )
+    parser.add_argument(
+        "export",
+        nargs="?",
+        help="JSONL file of tag_values messages, instead of the device's history",
+    )
+    parser.add_argument(
+        "--agent-id",
+        type=int,
+        help="the device to replay and write the final tags to, through the API",
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        default=datetime(1970, 1, 1, tzinfo=timezone.utc),
+        help="replay the device's history from this ISO 8601 date",
+    )
+    parser.add_argument(
+        "--api-url", default=os.environ.get("DOOVER_API_URL", DEFAULT_API_URL)
+    )
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("DOOVER_API_TOKEN"),
+        help="API token (default: $DOOVER_API_TOKEN)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the final tags instead of writing them",
+    )
+    parser.add_argument("--tracker-key", default="tracker_1")
+    parser.add_argument("--app-key", default="maintenance_manager_1")
+    parser.add_argument("--window-days", type=float, default=14)
+    args = parser.parse_args(argv)
+
+    if args.agent_id is None:
+        if args.export is None:
+            parser.error("an export or --agent-id is required")
+        usage = replay(iter_file_readings(args.export, args.tracker_key))
+        if usage.is_empty:
+            print(f"No {args.tracker_key} readings in {args.export}", file=sys.stderr)
+            return 1
+
+        update = {args.app_key: usage_tags(usage, args.window_days)}
+        print(json.dumps(update))
+        return 0
+
+    if not args.token:
+        parser.error("--agent-id needs an API token: --token or $DOOVER_API_TOKEN")
+
+    update = asyncio.run(_backfill_from_api(args))
+    if update is None:
+        print(f"No {args.tracker_key} readings to replay", file=sys.stderr)
+        return 1
+
+    print(json.dumps(update))
+    return 0
+
+
+def _offset(value, offset):
+    if value is None:
+        return None
+    return value + (offset or 0)
+
+
+def _from_ms(value):
+    try:
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    except (TypeError, ValueError, OSError):
+        return None
+
+
+def _section(data, key) -> dict:
+    """``data[key]`` if it is a dict, else an empty one."""
+    section = data.get(key) if isinstance(data, dict) else None
+    return section if isinstance(section, dict) else {}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
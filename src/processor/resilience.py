@@ -0,0 +1,102 @@
+"""
+Guards for calls to a slow or failing API.
+
+:class:`RetryBudget` retries failed calls with jittered backoff, inside one
+latency budget and one allowance of failed attempts shared by a series of
+calls. :class:`CircuitBreaker` stops a
+device calling an API that keeps failing for a cool-down period. It is
+persisted as a tag, so it holds across invocations.
+"""
+
+import asyncio
+import random
+import time
+
+
+class RetryBudget:
+    """
+    ``budget_s`` of latency and ``attempts`` failed attempts, shared by every
+    call made through :meth:`call`, so a series of calls (e.g. the pages of
+    a history replay) can't retry its way past either.
+    """
+
+    def __init__(
+        self,
+        budget_s: float,
+        attempts: int = 3,
+        base_delay_s: float = 0.25,
+        clock=time.monotonic,
+    ):
+        self.attempts = attempts
+        self.base_delay_s = base_delay_s
+        self.clock = clock
+        self.deadline = clock() + budget_s
+        self.failures = 0
+
+    @property
+    def remaining_s(self) -> float:
+        return self.deadline - self.clock()
+
+    async def call(self, make_call):
+        """
+        Await ``make_call()``, retrying on any error or timeout.
+
+        Each attempt is cut off at the end of the budget. Raises the last
+        error once the budget's failed attempts or its time run out.
+        """
+        while True:
+            if self.remaining_s <= 0:
+                raise TimeoutError("latency budget exhausted")
+            try:
+                return await asyncio.wait_for(make_call(), self.remaining_s)
+            except Exception:
+                self.failures += 1
+                # full jitter, so devices retrying together spread out
+                delay = random.uniform(0, self.base_delay_s * 2 ** (self.failures - 1))
+                if self.failures >= self.attempts or delay >= self.remaining_s:
+                    raise
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive failures, for ``cooldown_ms``.
+
+    Once the cool-down has passed one call is let through. If it fails, the
+    breaker opens again straight away.
+    """
+
+    def __init__(self, failures=0, open_until=None, threshold=3, cooldown_ms=None):
+        self.failures = failures
+        self.open_until = open_until
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms if cooldown_ms is not None else 30 * 60 * 1000
+
+    @classmethod
+    def from_tag(cls, value, **kwargs):
+        if not isinstance(value, dict):
+            return cls(**kwargs)
+        try:
+            open_until = value.get("open_until")
+            return cls(
+                int(value.get("failures") or 0),
+                int(open_until) if open_until is not None else None,
+                **kwargs,
+            )
+        except (TypeError, ValueError):
+            return cls(**kwargs)
+
+    def to_tag(self):
+        return {"failures": self.failures, "open_until": self.open_until}
+
+    def allow(self, now_ms) -> bool:
+        return self.open_until is None or now_ms >= self.open_until
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = None
+
+    def record_failure(self, now_ms):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.open_until = now_ms + self.cooldown_ms
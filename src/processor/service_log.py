@@ -0,0 +1,150 @@
+from .usage import HOURS_SCALE, KMS_SCALE
+
+# services kept per schedule, which bounds the tag size however old the
+# machine is
+MAX_SERVICES = 20
+
+# service dates are kept to the minute
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+
+
+class ServiceLog:
+    """
+    The last :data:`MAX_SERVICES` services recorded for a schedule.
+
+    Persisted as a single delta-encoded tag, newest first::
+
+        {"last": [<date ms>, <hours>, <kms>],
+         "d": [[<minutes>, <hours>, <kms>]...]}
+
+    where ``last`` is the most recent service and each entry of ``d`` is the
+    gap back to the service before, as integers in minutes, 0.01 h and
+    0.1 km. Reading the last N services only walks N entries.
+
+    A meter that wasn't known when a service was recorded is kept as None,
+    and so are its gaps to the services either side, rather than a made-up
+    reading skewing the intervals.
+    """
+
+    def __init__(self, last=None, deltas=None):
+        self.last: tuple[int, float | None, float | None] | None = last
+        self.deltas: list[tuple[int, int | None, int | None]] = list(deltas or [])
+
+    @classmethod
+    def from_tag(cls, value):
+        if not isinstance(value, dict) or value.get("last") is None:
+            return cls()
+        try:
+            date_ms, hours, kms = value["last"]
+            deltas = [
+                (int(minutes), _optional_int(d_hours), _optional_int(d_kms))
+                for minutes, d_hours, d_kms in value.get("d") or []
+            ]
+            return cls((int(date_ms), _meter(hours), _meter(kms)), deltas)
+        except (TypeError, ValueError):
+            return cls()
+
+    def to_tag(self):
+        if self.last is None:
+            return None
+        return {"last": list(self.last), "d": [list(d) for d in self.deltas]}
+
+    def __len__(self):
+        return 0 if self.last is None else 1 + len(self.deltas)
+
+    def append(self, date_ms, hours, kms):
+        """Record a service. Hours or kms of None weren't known."""
+        hours, kms = _meter(hours), _meter(kms)
+        if self.last is not None:
+            last_date, last_hours, last_kms = self.last
+            self.deltas.insert(
+                0,
+                (
+                    round((date_ms - last_date) / MINUTE_MS),
+                    _gap(hours, last_hours, HOURS_SCALE),
+                    _gap(kms, last_kms, KMS_SCALE),
+                ),
+            )
+            del self.deltas[MAX_SERVICES - 1 :]
+
+        self.last = (int(date_ms), hours, kms)
+
+    def recent(self, n=MAX_SERVICES):
+        """
+        The last ``n`` services as ``(date ms, hours, kms)``, newest first.
+        A meter is None where it, or a later reading it is counted back from,
+        wasn't known.
+        """
+        if self.last is None or n <= 0:
+            return []
+
+        date_ms, hours, kms = self.last
+        hours_units = _units(hours, HOURS_SCALE)
+        kms_units = _units(kms, KMS_SCALE)
+
+        services = [self.last]
+        for minutes, d_hours, d_kms in self.deltas[: n - 1]:
+            date_ms -= minutes * MINUTE_MS
+            hours_units = _back(hours_units, d_hours)
+            kms_units = _back(kms_units, d_kms)
+            services.append(
+                (
+                    date_ms,
+                    _value(hours_units, HOURS_SCALE),
+                    _value(kms_units, KMS_SCALE),
+                )
+            )
+        return services
+
+    def mean_interval(self):
+        """
+        The mean days, hours and kms between the services kept, or None with
+        fewer than two.
+        """
+        if not self.deltas:
+            return None
+
+        count = len(self.deltas)
+        return {
+            "days": sum(d[0] for d in self.deltas) * MINUTE_MS / DAY_MS / count,
+            # only over the gaps where both readings were known
+            "hours": _mean([d[1] for d in self.deltas], HOURS_SCALE),
+            "kms": _mean([d[2] for d in self.deltas], KMS_SCALE),
+        }
+
+
+def _meter(value):
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return None
+    return value
+
+
+def _optional_int(value):
+    return None if value is None else int(value)
+
+
+def _units(value, scale):
+    return None if value is None else round(value * scale)
+
+
+def _value(units, scale):
+    return None if units is None else units / scale
+
+
+def _gap(value, previous, scale):
+    """The gap from ``previous`` to ``value`` in units, or None if either is unknown."""
+    if value is None or previous is None:
+        return None
+    return _units(value, scale) - _units(previous, scale)
+
+
+def _back(units, gap):
+    if units is None or gap is None:
+        return None
+    return units - gap
+
+
+def _mean(gaps, scale):
+    known = [gap for gap in gaps if gap is not None]
+    return sum(known) / scale / len(known) if known else None
@@ -0,0 +1,94 @@
+import logging
+
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+
+class TagSession:
+    """
+    Per-invocation view of this app's own tags.
+
+    The app's tags are read once from the ``tag_values`` aggregate that the
+    processor already receives with the event, every read is served from that
+    snapshot, and writes are buffered until :meth:`flush`, which sends them as
+    a single aggregate update.
+    """
+
+    def __init__(self, api, agent_id, app_key, tag_values: dict[str, Any] | None):
+        self.api = api
+        self.agent_id = agent_id
+        self.app_key = app_key
+
+        try:
+            snapshot = (tag_values or {})[app_key]
+        except (KeyError, TypeError):
+            snapshot = None
+        self._snapshot: dict[str, Any] = dict(snapshot or {})
+        self._pending: dict[str, Any] = {}
+
+    def get(self, key, default=None):
+        if key in self._pending:
+            value = self._pending[key]
+        else:
+            value = self._snapshot.get(key)
+        return default if value is None else value
+
+    def set(self, key, value, tolerance=0) -> bool:
+        """
+        Buffer a tag write if ``value`` differs from the last persisted value.
+
+        Numeric values within ``tolerance`` of the persisted value are treated
+        as unchanged. Returns True if the tag will be written on flush.
+        """
+        if _is_unchanged(self._snapshot.get(key), value, tolerance):
+            self._pending.pop(key, None)
+            return False
+
+        self._pending[key] = value
+        return True
+
+    @property
+    def pending(self) -> dict[str, Any]:
+        return dict(self._pending)
+
+    def discard(self):
+        """Drop the buffered writes, e.g. of an invocation that failed part way."""
+        self._pending.clear()
+
+    async def flush(self):
+        """Write all buffered tags in one aggregate update."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        log.debug(f"Flushing {len(pending)} tag(s): {list(pending)}")
+        try:
+            await self.api.update_aggregate(
+                self.agent_id,
+                "tag_values",
+                {self.app_key: pending},
+            )
+        except Exception:
+            # keep the writes so a caller can retry the flush
+            self._pending = {**pending, **self._pending}
+            raise
+
+        self._snapshot.update(pending)
+
+
+def _is_unchanged(old, new, tolerance) -> bool:
+    if old is None or new is None:
+        return old is None and new is None
+
+    numeric = (int, float)
+    if (
+        tolerance
+        and isinstance(old, numeric)
+        and isinstance(new, numeric)
+        and not isinstance(old, bool)
+        and not isinstance(new, bool)
+    ):
+        return abs(new - old) < tolerance
+
+    return old == new
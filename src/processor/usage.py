@@ -0,0 +1,207 @@
+from itertools import accumulate
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# per-day usage is kept for a year, which bounds the tag size and the
+# longest averaging window
+MAX_DAYS = 365
+
+# deltas are stored as integers in these units (0.01 h and 0.1 km)
+HOURS_SCALE = 100
+KMS_SCALE = 10
+
+# a window shorter than this gives meaningless rates
+MIN_RATE_SPAN_MS = 60 * 60 * 1000
+
+
+class DailyUsage:
+    """
+    Per-day engine hours and km used, for the last :data:`MAX_DAYS` days.
+
+    Each reading from the tracker adds the change since the previous reading
+    to the day(s) it happened in. When readings are days apart the change is
+    spread evenly over the gap, so days without data still count towards an
+    average. Usage is kept as scaled integer deltas, and persisted as a single
+    tag::
+
+        {"day": <first day>, "h": [<hours>...], "k": [<kms>...],
+         "since": <first reading ms>, "last": [<ms>, <run_hours>, <odometer_km>]}
+
+    Prefix sums over the buckets give the usage for any window in O(1).
+    """
+
+    def __init__(self, first_day=None, hours=None, kms=None, since=None, last=None):
+        self.first_day: int | None = first_day
+        self.hours: list[int] = list(hours or [])
+        self.kms: list[int] = list(kms or [])
+        self.since: int | None = since
+        self.last: tuple[int, float | None, float | None] | None = last
+        self._prefix = None
+
+    @classmethod
+    def from_tag(cls, value):
+        if not isinstance(value, dict):
+            return cls()
+        try:
+            hours = [int(v) for v in value.get("h") or []]
+            kms = [int(v) for v in value.get("k") or []]
+            if len(hours) != len(kms):
+                return cls()
+
+            last = value.get("last")
+            if last is not None:
+                ts, run_hours, odometer_km = last
+                last = (int(ts), run_hours, odometer_km)
+
+            first_day = value.get("day")
+            since = value.get("since")
+            return cls(
+                int(first_day) if first_day is not None else None,
+                hours,
+                kms,
+                int(since) if since is not None else None,
+                last,
+            )
+        except (TypeError, ValueError):
+            return cls()
+
+    @staticmethod
+    def peek_last(value):
+        """The last reading in a stored tag, without decoding the buckets."""
+        try:
+            ts, run_hours, odometer_km = value["last"]
+            return int(ts), run_hours, odometer_km
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def to_tag(self):
+        return {
+            "day": self.first_day,
+            "h": self.hours,
+            "k": self.kms,
+            "since": self.since,
+            "last": list(self.last) if self.last is not None else None,
+        }
+
+    @property
+    def is_empty(self) -> bool:
+        return self.last is None
+
+    def record(self, ts_ms, run_hours, odometer_km) -> bool:
+        """
+        Add a meter reading. Returns False if it is not newer than the last one.
+        """
+        ts_ms = int(ts_ms)
+        if self.last is None:
+            self.since = ts_ms
+            self.last = (ts_ms, run_hours, odometer_km)
+            self._add(ts_ms // DAY_MS, 0, 0)
+            return True
+
+        last_ts, last_hours, last_kms = self.last
+        if ts_ms <= last_ts:
+            return False
+
+        hours_delta = _scaled_delta(last_hours, run_hours, HOURS_SCALE)
+        kms_delta = _scaled_delta(last_kms, odometer_km, KMS_SCALE)
+        self._spread(last_ts, ts_ms, hours_delta, kms_delta)
+
+        self.last = (
+            ts_ms,
+            run_hours if run_hours is not None else last_hours,
+            odometer_km if odometer_km is not None else last_kms,
+        )
+        return True
+
+    def average_rates(self, now_ms, window_days):
+        """Average hours and kms per day over the last ``window_days``."""
+        if self.is_empty or not self.hours:
+            return None
+
+        today = now_ms // DAY_MS
+        start_day = max((now_ms - int(window_days * DAY_MS)) // DAY_MS, self.first_day)
+        end_day = min(today, self.first_day + len(self.hours) - 1)
+
+        span_ms = now_ms - max(start_day * DAY_MS, self.since)
+        if span_ms < MIN_RATE_SPAN_MS:
+            return None
+
+        hours, kms = self.usage_between(start_day, end_day)
+        span_days = span_ms / DAY_MS
+        return {
+            "run_hours": hours / span_days,
+            "odometer": kms / span_days,
+        }
+
+    def usage_between(self, start_day, end_day):
+        """Total hours and kms used from ``start_day`` to ``end_day`` inclusive."""
+        if self.first_day is None or end_day < start_day:
+            return 0, 0
+
+        if self._prefix is None:
+            self._prefix = (
+                list(accumulate(self.hours, initial=0)),
+                list(accumulate(self.kms, initial=0)),
+            )
+        hours_prefix, kms_prefix = self._prefix
+
+        lo = min(max(start_day - self.first_day, 0), len(self.hours))
+        hi = min(max(end_day - self.first_day + 1, 0), len(self.hours))
+        return (
+            (hours_prefix[hi] - hours_prefix[lo]) / HOURS_SCALE,
+            (kms_prefix[hi] - kms_prefix[lo]) / KMS_SCALE,
+        )
+
+    def _spread(self, start_ms, end_ms, hours_delta, kms_delta):
+        # distribute the deltas over the days between two readings in
+        # proportion to the time spent in each, without accumulating rounding
+        # error. Days that would immediately fall out of the store are skipped.
+        total = end_ms - start_ms
+        first = max(start_ms // DAY_MS, end_ms // DAY_MS - MAX_DAYS + 1)
+        last = end_ms // DAY_MS
+
+        prev_hours = prev_kms = 0
+        if first > start_ms // DAY_MS:
+            done = first * DAY_MS - start_ms
+            prev_hours = round(hours_delta * done / total)
+            prev_kms = round(kms_delta * done / total)
+
+        for day in range(first, last + 1):
+            done = min((day + 1) * DAY_MS, end_ms) - start_ms
+            cum_hours = round(hours_delta * done / total)
+            cum_kms = round(kms_delta * done / total)
+            self._add(day, cum_hours - prev_hours, cum_kms - prev_kms)
+            prev_hours, prev_kms = cum_hours, cum_kms
+
+    def _add(self, day, hours, kms):
+        if self.first_day is None:
+            self.first_day = day
+
+        if day < self.first_day:
+            # too old to keep
+            return
+
+        end_day = self.first_day + len(self.hours)
+        if day >= end_day:
+            padding = day - end_day + 1
+            self.hours.extend([0] * padding)
+            self.kms.extend([0] * padding)
+
+        idx = day - self.first_day
+        self.hours[idx] += hours
+        self.kms[idx] += kms
+
+        overflow = len(self.hours) - MAX_DAYS
+        if overflow > 0:
+            del self.hours[:overflow]
+            del self.kms[:overflow]
+            self.first_day += overflow
+
+        self._prefix = None
+
+
+def _scaled_delta(old, new, scale) -> int:
+    if old is None or new is None:
+        return 0
+    # meters shouldn't run backwards; treat a reset as no usage
+    return max(round(new * scale) - round(old * scale), 0)
@@ -0,0 +1,32 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def fakes():
+    """The fake Doover backend and app factories in tests/fakes.py."""
+    # imported when a test asks for it, as it needs pydoover and the pure
+    # modules' tests don't
+    from tests import fakes
+
+    return fakes
+
+
+def pytest_terminal_summary(terminalreporter):
+    # only if the benchmarks were collected; importing them here would fail
+    # the whole run whenever they can't be
+    benchmarks = sys.modules.get("tests.test_benchmarks")
+    results = getattr(benchmarks, "RESULTS", None)
+    if not results:
+        return
+
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'scenario':<16}{'wall ms':>10}{'api calls':>12}{'tag writes':>12}"
+    )
+    for name, result in sorted(results.items()):
+        terminalreporter.write_line(
+            f"{name:<16}{result['wall_ms']:>10.3f}"
+            f"{result.get('api_calls', '-'):>12}{result.get('tag_writes', '-'):>12}"
+        )
@@ -0,0 +1,266 @@
+"""
+In-process stand-ins for the Doover processor API.
+
+These let the maintenance manager and dashboard run end to end without a
+network: tags, channels and aggregates live in memory on
+:class:`FakeDooverAPI`, which also counts every call the applications make.
+"""
+
+import copy
+import itertools
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from dashboard.app_config import MaintenanceDashboardConfig
+from dashboard.application import MaintenanceDashboardApp
+from processor.app_config import MaintenanceManagerConfig
+from processor.application import MaintenanceManagerApplication
+
+APP_KEY = "maintenance_manager_1"
+DASHBOARD_APP_KEY = "maintenance_dashboard_1"
+TRACKER_KEY = "tracker_1"
+
+# the device the scenario helpers below set up, and its manager's intervals
+AGENT_ID = 1
+INTERVALS = {
+    "service_interval_hours": 250,
+    "service_interval_kms": 5000,
+    "service_interval_months": 6,
+}
+
+# UI commands that the real UI manager dispatches to a decorated callback
+CALLBACKS = {
+    "setHours": "on_set_hours",
+    "setKms": "on_set_kms",
+    "reset_service": "on_reset_service",
+}
+
+_message_ids = itertools.count(1)
+
+
+class FakeMessage:
+    def __init__(self, data, timestamp: datetime | None = None):
+        self.id = next(_message_ids)
+        self.data = data
+        self.timestamp = timestamp or datetime.now(tz=timezone.utc)
+
+
+class FakeEvent:
+    def __init__(self, agent_id, channel_name, data, timestamp=None):
+        self.agent_id = agent_id
+        self.channel_name = channel_name
+        self.message = FakeMessage(data, timestamp)
+
+
+class FakeAggregateEvent:
+    def __init__(self, agent_id, channel_name, request_data):
+        self.agent_id = agent_id
+        self.channel_name = channel_name
+        self.request_data = request_data
+
+
+def merge(target: dict, patch: dict):
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+class FakeDooverAPI:
+    """Channels, messages and aggregates for any number of agents, in memory."""
+
+    def __init__(self):
+        self.aggregates: dict[tuple[int, str], dict] = {}
+        self.messages: dict[tuple[int, str], list[FakeMessage]] = {}
+        self.calls = Counter()
+        self.tag_writes = 0
+        self.bytes_sent = 0
+        # called with (agent_id, channel_name, data) after each aggregate
+        # update, like a subscription
+        self.listeners = []
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.tag_writes = 0
+        self.bytes_sent = 0
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def aggregate(self, agent_id, channel_name) -> dict:
+        return self.aggregates.setdefault((agent_id, channel_name), {})
+
+    def add_message(self, agent_id, channel_name, data, timestamp=None):
+        message = FakeMessage(data, timestamp)
+        self.messages.setdefault((agent_id, channel_name), []).append(message)
+        return message
+
+    async def get_channel_messages(
+        self,
+        agent_id,
+        channel_name,
+        after=None,
+        before=None,
+        limit=None,
+        field_names=None,
+    ):
+        self.calls["get_channel_messages"] += 1
+        messages = sorted(
+            self.messages.get((agent_id, channel_name), []), key=lambda m: m.timestamp
+        )
+        if after is not None:
+            messages = [m for m in messages if m.timestamp >= after]
+        if before is not None:
+            messages = [m for m in messages if m.timestamp < before]
+        return messages[:limit] if limit is not None else messages
+
+    async def fetch_channel_aggregate(self, agent_id, channel_name):
+        self.calls["fetch_channel_aggregate"] += 1
+        return copy.deepcopy(self.aggregate(agent_id, channel_name))
+
+    async def update_aggregate(self, agent_id, channel_name, data, **kwargs):
+        self.calls["update_aggregate"] += 1
+        self.bytes_sent += len(repr(data))
+        if channel_name == "tag_values":
+            self.tag_writes += sum(len(v) for v in data.values() if isinstance(v, dict))
+        merge(self.aggregate(agent_id, channel_name), data)
+        for listener in self.listeners:
+            listener(agent_id, channel_name, data)
+
+    async def create_message(self, agent_id, channel_name, data, **kwargs):
+        self.calls["create_message"] += 1
+        self.bytes_sent += len(repr(data))
+        return self.add_message(agent_id, channel_name, data)
+
+    async def ping_connection_at(self, agent_id, *args, **kwargs):
+        self.calls["ping_connection_at"] += 1
+
+
+class FakeUIManager:
+    """Records UI pushes and dispatches UI commands like the real manager."""
+
+    def __init__(self, app, api: FakeDooverAPI):
+        self.app = app
+        self.api = api
+        self.children = []
+
+    def add_children(self, *children):
+        self.children.extend(children)
+
+    def set_children(self, children):
+        self.children = list(children)
+
+    def set_position(self, position):
+        pass
+
+    def register_interactions(self, app):
+        pass
+
+    def register_callbacks(self, app):
+        pass
+
+    async def push_async(self, even_if_empty=False):
+        await self.api.update_aggregate(
+            self.app.agent_id, "ui_state", {"state": {"pushed": True}}
+        )
+
+    async def on_command_update_async(self, _, data):
+        commands = data.get(self.app.app_key, data)
+        elements = {getattr(e, "name", None): e for e in vars(self.app.ui).values()}
+        for name, value in commands.items():
+            name = name.removeprefix(f"{self.app.app_key}_")
+            element = elements.get(name)
+            if element is None:
+                continue
+            if name in CALLBACKS:
+                await getattr(self.app, CALLBACKS[name])(element, value)
+            else:
+                element.coerce(value)
+
+
+def make_config(**values):
+    """A MaintenanceManagerConfig with the given element values loaded."""
+    MaintenanceManagerConfig.clear_elements()
+    config = MaintenanceManagerConfig()
+    values.setdefault("tracker_app_key", TRACKER_KEY)
+    for name, value in values.items():
+        getattr(config, name).load_data(value)
+    return config
+
+
+async def make_manager(api: FakeDooverAPI, agent_id, **config_values):
+    """Set up a manager for one invocation, as the processor runtime would."""
+    app = MaintenanceManagerApplication(config=make_config(**config_values))
+    app.api = api
+    app.agent_id = agent_id
+    app.app_key = APP_KEY
+    app._tag_values = copy.deepcopy(api.aggregate(agent_id, "tag_values"))
+    app.ui_manager = FakeUIManager(app, api)
+    await app.setup()
+    return app
+
+
+async def make_dashboard(api: FakeDooverAPI, agent_id):
+    """Set up a dashboard for one invocation, as the processor runtime would."""
+    MaintenanceDashboardConfig.clear_elements()
+    app = MaintenanceDashboardApp(config=MaintenanceDashboardConfig())
+    app.api = api
+    app.agent_id = agent_id
+    app.app_key = DASHBOARD_APP_KEY
+    app.organisation_id = None
+    app._tag_values = copy.deepcopy(api.aggregate(agent_id, "tag_values"))
+    app.ui_manager = FakeUIManager(app, api)
+    await app.setup()
+    return app
+
+
+# --- scenarios ---
+
+
+def seed_device(api: FakeDooverAPI, run_hours=1000.0, odometer_km=20000.0):
+    """A device whose tracker has reported daily for the last 20 days."""
+    now = datetime.now(tz=timezone.utc)
+    for days_ago in range(20, 0, -1):
+        api.add_message(
+            AGENT_ID,
+            "tag_values",
+            {
+                TRACKER_KEY: {
+                    "run_hours": run_hours - 8 * days_ago,
+                    "odometer_km": odometer_km - 200 * days_ago,
+                }
+            },
+            timestamp=now - timedelta(days=days_ago),
+        )
+    set_tracker(api, run_hours, odometer_km)
+
+
+def set_tracker(api: FakeDooverAPI, run_hours, odometer_km):
+    api.aggregate(AGENT_ID, "tag_values")[TRACKER_KEY] = {
+        "run_hours": run_hours,
+        "odometer_km": odometer_km,
+    }
+
+
+def tracker_event(run_hours, odometer_km):
+    return FakeEvent(
+        AGENT_ID,
+        "tag_values",
+        {TRACKER_KEY: {"run_hours": run_hours, "odometer_km": odometer_km}},
+    )
+
+
+def ui_cmd_event(commands):
+    return FakeEvent(AGENT_ID, "ui_cmds", {APP_KEY: commands})
+
+
+async def first_message(api: FakeDooverAPI):
+    """Run the device's first message through a manager, to set up its tags."""
+    seed_device(api)
+    app = await make_manager(api, AGENT_ID, **INTERVALS)
+    await app.on_message_create(tracker_event(1000.0, 20000.0))
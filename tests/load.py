@@ -0,0 +1,339 @@
+"""
+Load harness: a synthetic fleet's traffic through the manager and dashboard.
+
+Each device in the fleet has a usage profile and a tracker that reports its
+run hours and odometer a few times an hour. The traffic is replayed in time
+order against :class:`tests.fakes.FakeDooverAPI`, one manager invocation per
+message and one scheduled dashboard invocation per simulated hour. Both apps
+see a simulated clock, so throttling and history windows behave as they would
+over the simulated hours, however quickly they replay.
+
+Run it with::
+
+    PYTHONPATH=src python -m tests.load --devices 50 --hours 24
+
+which reports throughput, invocation latency percentiles and API calls per
+device-hour.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import heapq
+import random
+import statistics
+import time
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import dashboard.application as dashboard_app
+import processor.application as manager_app
+
+from tests import fakes
+
+DASHBOARD_ID = 1
+
+# manager config for every device in the fleet
+FLEET_CONFIG = {
+    "service_interval_hours": 250,
+    "service_interval_kms": 5000,
+    "service_interval_months": 6,
+}
+
+
+class UsageProfile:
+    """
+    How a machine is used: the run hours and kms it does on a working day,
+    spread over the working hours.
+    """
+
+    def __init__(self, hours_per_day, kms_per_day, working_hours=(6, 18)):
+        self.hours_per_day = hours_per_day
+        self.kms_per_day = kms_per_day
+        self.working_hours = working_hours
+
+    def usage(self, start: datetime, end: datetime, rng: random.Random):
+        """The run hours and kms done between ``start`` and ``end``."""
+        first, last = self.working_hours
+        if not first <= start.hour < last:
+            return 0.0, 0.0
+
+        share = (end - start) / timedelta(hours=last - first)
+        jitter = rng.uniform(0.5, 1.5)
+        return (
+            self.hours_per_day * share * jitter,
+            self.kms_per_day * share * jitter,
+        )
+
+
+USAGE_PROFILES = {
+    "standby": UsageProfile(1, 0),
+    "site": UsageProfile(8, 30),
+    "haulage": UsageProfile(10, 450, working_hours=(4, 20)),
+}
+
+
+class SyntheticDevice:
+    def __init__(self, agent_id, profile, run_hours, odometer_km):
+        self.agent_id = agent_id
+        self.profile = profile
+        self.run_hours = run_hours
+        self.odometer_km = odometer_km
+
+    def reading(self):
+        return {
+            fakes.TRACKER_KEY: {
+                "run_hours": round(self.run_hours, 2),
+                "odometer_km": round(self.odometer_km, 1),
+            }
+        }
+
+    def advance(self, start, end, rng):
+        hours, kms = self.profile.usage(start, end, rng)
+        self.run_hours += hours
+        self.odometer_km += kms
+
+
+def synthetic_fleet(devices, profiles=None, seed=0) -> list[SyntheticDevice]:
+    """
+    ``devices`` machines with profiles drawn from ``profiles``, a mapping of
+    profile name to weight (all of :data:`USAGE_PROFILES` equally by default).
+    """
+    rng = random.Random(seed)
+    profiles = profiles or dict.fromkeys(USAGE_PROFILES, 1)
+    names = list(profiles)
+    weights = [profiles[name] for name in names]
+    return [
+        SyntheticDevice(
+            DASHBOARD_ID + 1 + i,
+            USAGE_PROFILES[rng.choices(names, weights)[0]],
+            run_hours=rng.uniform(0, 5000),
+            odometer_km=rng.uniform(0, 100_000),
+        )
+        for i in range(devices)
+    ]
+
+
+def seed_history(api, fleet, start, days, rng):
+    """Give each tracker a daily reading for ``days`` before ``start``."""
+    for device in fleet:
+        for day in range(days, 0, -1):
+            timestamp = start - timedelta(days=day)
+            api.add_message(device.agent_id, "tag_values", device.reading(), timestamp)
+            device.advance(timestamp, timestamp + timedelta(days=1), rng)
+
+
+def traffic(fleet, start, hours, messages_per_hour, rng):
+    """
+    The fleet's tracker messages over ``hours`` from ``start``, in time order,
+    as ``(timestamp, device, data)``.
+    """
+    period = timedelta(hours=1) / messages_per_hour
+    end = start + timedelta(hours=hours)
+
+    def device_traffic(device):
+        # devices report on the same period but not in step
+        timestamp = start + period * rng.random()
+        while timestamp < end:
+            device.advance(timestamp - period, timestamp, rng)
+            yield timestamp, device.agent_id, device, device.reading()
+            timestamp += period
+
+    for timestamp, _, device, data in heapq.merge(
+        *(device_traffic(device) for device in fleet)
+    ):
+        yield timestamp, device, data
+
+
+class SimulatedClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def time(self):
+        return self.now.timestamp()
+
+    @contextlib.contextmanager
+    def patched(self):
+        """Have both applications read the time from this clock."""
+        clock = self
+
+        class SimulatedDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                if tz is None:
+                    return clock.now.replace(tzinfo=None)
+                return clock.now.astimezone(tz)
+
+        simulated_time = SimpleNamespace(
+            time=self.time, monotonic=time.monotonic, perf_counter=time.perf_counter
+        )
+        with (
+            mock.patch.object(manager_app, "time", simulated_time),
+            mock.patch.object(manager_app, "datetime", SimulatedDatetime),
+            mock.patch.object(dashboard_app, "datetime", SimulatedDatetime),
+        ):
+            yield
+
+
+class LoadReport:
+    def __init__(self, devices, hours):
+        self.devices = devices
+        self.hours = hours
+        self.latencies_ms: dict[str, list[float]] = {}
+        self.calls = Counter()
+        self.wall_s = 0.0
+
+    def record(self, kind, elapsed_ms):
+        self.latencies_ms.setdefault(kind, []).append(elapsed_ms)
+
+    @property
+    def invocations(self):
+        return sum(len(timings) for timings in self.latencies_ms.values())
+
+    @property
+    def throughput(self):
+        """Invocations handled per second of wall time."""
+        return self.invocations / self.wall_s if self.wall_s else 0.0
+
+    @property
+    def calls_per_device_hour(self):
+        return sum(self.calls.values()) / (self.devices * self.hours)
+
+    def percentiles(self, kind):
+        """The p50, p95 and p99 latency of one kind of invocation, in ms."""
+        timings = self.latencies_ms.get(kind) or [0.0]
+        if len(timings) == 1:
+            return dict.fromkeys(("p50", "p95", "p99"), timings[0])
+        cuts = statistics.quantiles(timings, n=100, method="inclusive")
+        return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+    def format(self):
+        lines = [
+            f"{self.devices} devices over {self.hours} simulated hours",
+            (
+                f"{self.invocations} invocations in {self.wall_s:.1f} s "
+                f"({self.throughput:.0f}/s)"
+            ),
+            "",
+            f"{'invocation':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+        ]
+        for kind, timings in sorted(self.latencies_ms.items()):
+            p = self.percentiles(kind)
+            lines.append(
+                f"{kind:<12}{len(timings):>8}"
+                f"{p['p50']:>10.2f}{p['p95']:>10.2f}{p['p99']:>10.2f}"
+            )
+
+        lines += ["", f"API calls per device-hour: {self.calls_per_device_hour:.2f}"]
+        for name, count in self.calls.most_common():
+            lines.append(f"  {name:<28}{count / (self.devices * self.hours):>8.2f}")
+        return "\n".join(lines)
+
+
+async def run_load(
+    devices=20,
+    hours=24,
+    messages_per_hour=4,
+    profiles=None,
+    history_days=14,
+    seed=0,
+    **config,
+) -> LoadReport:
+    """Replay a synthetic fleet's traffic and report how the apps handled it."""
+    rng = random.Random(seed)
+    config = {**FLEET_CONFIG, **config}
+    start = datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0)
+    clock = SimulatedClock(start)
+
+    api = fakes.FakeDooverAPI()
+    fleet = synthetic_fleet(devices, profiles, seed)
+    seed_history(api, fleet, start, history_days, rng)
+
+    # the dashboard reads the fleet's tags on its schedule
+    api.aggregate(DASHBOARD_ID, "deployment_config")["applications"] = {
+        fakes.DASHBOARD_APP_KEY: {
+            "DEVICE_MAP": {str(device.agent_id): "" for device in fleet}
+        }
+    }
+
+    report = LoadReport(devices, hours)
+    api.reset_counters()
+
+    # an invocation is timed from setup, as the runtime would run it
+    async def manager(event):
+        app = await fakes.make_manager(api, event.agent_id, **config)
+        await app.on_message_create(event)
+
+    async def dashboard():
+        app = await fakes.make_dashboard(api, DASHBOARD_ID)
+        await app.on_schedule(None)
+
+    async def invoke(kind, invocation):
+        started = time.perf_counter()
+        await invocation
+        report.record(kind, (time.perf_counter() - started) * 1000)
+
+    next_sweep = start + timedelta(hours=1)
+    wall_start = time.perf_counter()
+    with clock.patched():
+        for timestamp, device, data in traffic(
+            fleet, start, hours, messages_per_hour, rng
+        ):
+            while next_sweep <= timestamp:
+                clock.now = next_sweep
+                await invoke("dashboard", dashboard())
+                next_sweep += timedelta(hours=1)
+
+            clock.now = timestamp
+            api.add_message(device.agent_id, "tag_values", data, timestamp)
+            fakes.merge(api.aggregate(device.agent_id, "tag_values"), data)
+            event = fakes.FakeEvent(device.agent_id, "tag_values", data, timestamp)
+            await invoke("manager", manager(event))
+
+    report.wall_s = time.perf_counter() - wall_start
+    report.calls = Counter(api.calls)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--hours", type=int, default=24, help="simulated hours")
+    parser.add_argument(
+        "--rate", type=float, default=4, help="tracker messages per device-hour"
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        choices=sorted(USAGE_PROFILES),
+        help="usage profile to draw devices from (repeatable, default all)",
+    )
+    parser.add_argument("--history-days", type=int, default=14)
+    parser.add_argument(
+        "--min-recompute",
+        type=int,
+        default=0,
+        help="the managers' minimum recompute interval, in minutes",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_load(
+            devices=args.devices,
+            hours=args.hours,
+            messages_per_hour=args.rate,
+            profiles=Counter(args.profile) if args.profile else None,
+            history_days=args.history_days,
+            seed=args.seed,
+            min_recompute_interval=args.min_recompute,
+        )
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from maintenance_common.alerts import (
+    DUE_SOON,
+    OK,
+    OVERDUE,
+    alert_level,
+    alert_message,
+)
+
+
+def test_levels():
+    assert alert_level(30, 100, 2000, soon_days=7) == OK
+    assert alert_level(7, 100, 2000, soon_days=7) == DUE_SOON
+    assert alert_level(30, 20, 2000, soon_days=7, soon_hours=25) == DUE_SOON
+    assert alert_level(0, 100, 2000) == OK
+    assert alert_level(-1, 100, 2000) == OVERDUE
+    assert alert_level(30, 100, 0, soon_days=7) == OVERDUE
+
+
+def test_unknown_values_are_ignored():
+    assert alert_level(None, None, None, 7, 25, 500) == OK
+    assert alert_level(None, 10, None, soon_days=7) == OK
+
+
+def test_alert_message():
+    message = alert_message("Oil Service", OVERDUE, DUE_SOON, {"hours_till": -3})
+    assert message == {
+        "schedule": "Oil Service",
+        "level": OVERDUE,
+        "previous_level": DUE_SOON,
+        "message": "Oil Service is overdue",
+        "hours_till": -3,
+    }
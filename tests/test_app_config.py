@@ -0,0 +1,78 @@
+from maintenance_common.schedules import parse_schedules
+
+
+def load_config(**values):
+    """A MaintenanceManagerConfig loaded as the runtime loads a deployment."""
+    from processor.app_config import MaintenanceManagerConfig
+
+    MaintenanceManagerConfig.clear_elements()
+    config = MaintenanceManagerConfig()
+    config._inject_deployment_config(
+        {
+            "dv_proc_subscriptions": ["tag_values", "ui_cmds"],
+            "tracker_app_key": "tracker_1",
+            **values,
+        }
+    )
+    return config
+
+
+def test_config_defaults():
+    config = load_config()
+    # throttling is opt-in
+    assert config.min_recompute_interval.value == 0.0
+    assert config.alert_days.value == 7.0
+
+
+def test_config_values():
+    config = load_config(**{"min_recompute_interval_(mins)": 15.0})
+    assert config.min_recompute_interval.value == 15.0
+
+
+def test_service_schedules_load():
+    config = load_config(
+        additional_service_schedules=[
+            {"name": "Oil Service", "interval_(hours)": 250.0},
+            {"name": "Inspection", "interval_(months)": 12.0},
+            # no interval set
+            {"name": "Major Service"},
+        ]
+    )
+
+    schedules = parse_schedules(config.service_schedules.elements)
+    assert [
+        (s.key, s.interval_hours, s.interval_kms, s.interval_months) for s in schedules
+    ] == [
+        ("oil_service", 250.0, None, None),
+        ("inspection", None, None, 12.0),
+    ]
+
+
+def test_service_schedules_are_optional():
+    # deployments from before additional schedules were added don't have them
+    config = load_config()
+    assert not config.service_schedules.required
+    assert parse_schedules(config.service_schedules.elements) == []
+
+    config = load_config(additional_service_schedules=[])
+    assert parse_schedules(config.service_schedules.elements) == []
+
+
+def test_dashboard_config_defaults():
+    # dashboards deployed before the schedule was added only have their
+    # extended permissions
+    from dashboard.app_config import MaintenanceDashboardConfig
+
+    MaintenanceDashboardConfig.clear_elements()
+    config = MaintenanceDashboardConfig()
+    config._inject_deployment_config(
+        {
+            "dv_proc_extended_permissions": {
+                "devices": [],
+                "groups": [],
+                "apps_installed": [],
+            }
+        }
+    )
+    assert config.subscription.value == "deployment_config"
+    assert config.schedule.value == "rate(1 hour)"
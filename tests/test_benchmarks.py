@@ -0,0 +1,195 @@
+"""
+Micro-benchmarks for the per-message hot paths.
+
+Each scenario reports wall time per invocation, API calls per message and tag
+writes per message, and is checked against ``benchmark_baseline.json``: more
+API calls or tag writes than the baseline, or a median wall time more than
+``WALL_TIME_TOLERANCE`` times the baseline, fails the test.
+
+Run with ``UPDATE_BENCHMARK_BASELINE=1`` to record the current numbers as the
+new baseline.
+"""
+
+import json
+import os
+import statistics
+import time
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from processor import forecast
+from processor.usage import DAY_MS, MAX_DAYS, DailyUsage
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+WALL_TIME_TOLERANCE = 3.0
+REPEATS = 25
+
+# filled in as the benchmarks run, and reported by conftest.py
+RESULTS: dict[str, dict] = {}
+
+
+def check_against_baseline(name, wall_ms, api_calls=None, tag_writes=None):
+    result = {"wall_ms": round(wall_ms, 4)}
+    if api_calls is not None:
+        result["api_calls"] = api_calls
+        result["tag_writes"] = tag_writes
+    RESULTS[name] = result
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if os.environ.get("UPDATE_BENCHMARK_BASELINE"):
+        baseline[name] = result
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=4, sort_keys=True) + "\n")
+        return
+
+    expected = baseline[name]
+    for key in ("api_calls", "tag_writes"):
+        if key in expected:
+            assert result[key] <= expected[key], f"{name}: {key} regressed"
+    assert wall_ms <= expected["wall_ms"] * WALL_TIME_TOLERANCE, (
+        f"{name}: {wall_ms:.3f} ms vs baseline {expected['wall_ms']} ms"
+    )
+
+
+def time_call(func, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+# --- pure engine ---
+
+
+def full_usage_store(now_ms):
+    usage = DailyUsage()
+    start = now_ms - MAX_DAYS * DAY_MS
+    for day in range(MAX_DAYS):
+        usage.record(start + day * DAY_MS, 8 * day, 200 * day)
+    return usage.to_tag()
+
+
+def test_bench_usage_rates():
+    now_ms = int(time.time() * 1000)
+    tag = full_usage_store(now_ms)
+
+    def per_message():
+        usage = DailyUsage.from_tag(tag)
+        usage.record(now_ms, 8 * MAX_DAYS, 200 * MAX_DAYS)
+        usage.average_rates(now_ms, 14)
+        usage.to_tag()
+
+    check_against_baseline("usage_rates", time_call(per_message))
+
+
+def test_bench_forecast():
+    now = datetime.now(tz=timezone.utc)
+    last_service_date = now - timedelta(days=30)
+
+    def per_message():
+        # the main interval and two additional schedules, each forecast and
+        # turned into its tags as a tracker message does
+        for intervals in ((250, 5000, 6), (500, None, None), (None, None, 12)):
+            service = forecast.forecast_service(
+                now, 1100, 21000, 8, 200, 1000, 20000, last_service_date, *intervals
+            )
+            forecast.service_tags(service)
+
+    check_against_baseline("forecast", time_call(per_message, repeats=200))
+
+
+def test_bench_due_dates():
+    now = datetime.now(tz=timezone.utc)
+    next_service_date = now + timedelta(days=150)
+
+    def per_command():
+        # a UI command that moves one meter reprojects its due dates only
+        due = forecast.due_dates(
+            now, 1100, 21000, 8, 200, 1250, 25000, next_service_date
+        )
+        forecast.earliest_due(due)
+
+    check_against_baseline("due_dates", time_call(per_command, repeats=200))
+
+
+# --- full handler against the fake backend ---
+
+
+async def run_scenario(fakes, prepare, event_factory, **config):
+    """Time on_message_create for a fresh backend prepared by ``prepare``."""
+    config = {**fakes.INTERVALS, "min_recompute_interval": 0, **config}
+    timings = []
+    for _ in range(REPEATS):
+        api = fakes.FakeDooverAPI()
+        await prepare(api)
+        app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+        event = event_factory()
+
+        api.reset_counters()
+        start = time.perf_counter()
+        await app.on_message_create(event)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings), api.total_calls, api.tag_writes
+
+
+@pytest.mark.asyncio
+async def test_bench_first_run(fakes):
+    async def prepare(api):
+        fakes.seed_device(api)
+
+    result = await run_scenario(
+        fakes, prepare, lambda: fakes.tracker_event(1000.0, 20000.0)
+    )
+    check_against_baseline("first_run", *result)
+
+
+@pytest.mark.asyncio
+async def test_bench_steady_state(fakes):
+    async def prepare(api):
+        await fakes.first_message(api)
+        fakes.set_tracker(api, 1001.0, 20040.0)
+
+    result = await run_scenario(
+        fakes, prepare, lambda: fakes.tracker_event(1001.0, 20040.0)
+    )
+    check_against_baseline("steady_state", *result)
+
+
+@pytest.mark.asyncio
+async def test_bench_throttled(fakes):
+    async def prepare(api):
+        await fakes.first_message(api)
+        fakes.set_tracker(api, 1000.1, 20001.0)
+
+    result = await run_scenario(
+        fakes,
+        prepare,
+        lambda: fakes.tracker_event(1000.1, 20001.0),
+        min_recompute_interval=5,
+    )
+    check_against_baseline("throttled", *result)
+
+
+@pytest.mark.asyncio
+async def test_bench_ui_cmds(fakes):
+    result = await run_scenario(
+        fakes,
+        fakes.first_message,
+        lambda: fakes.ui_cmd_event({"setHours": 2000}),
+    )
+    check_against_baseline("ui_cmds", *result)
+
+
+@pytest.mark.asyncio
+async def test_bench_reset_service(fakes):
+    result = await run_scenario(
+        fakes,
+        fakes.first_message,
+        lambda: fakes.ui_cmd_event({"reset_service": True}),
+    )
+    check_against_baseline("reset_service", *result)
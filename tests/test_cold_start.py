@@ -0,0 +1,79 @@
+"""
+Cold-start budget for the Lambda entry points.
+
+Both apps deploy as 128 MB Lambdas, and most devices are invoked rarely enough
+that many invocations are cold starts. Each check imports a module in a fresh
+interpreter and measures the import time and peak resident memory. A failure
+lists the slowest imports from ``python -X importtime``.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_TIME_BUDGET_S = 1.5
+RSS_BUDGET_MB = 80
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": sorted(sys.modules),
+}}))
+"""
+
+
+def probe(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout), slowest_imports(proc.stderr)
+
+
+def slowest_imports(importtime_output, count=10):
+    """The slowest imports by cumulative time, from ``-X importtime`` output."""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        try:
+            rows.append((int(fields[1]), fields[2].strip()))
+        except (IndexError, ValueError):
+            # the header row
+            continue
+    rows.sort(reverse=True)
+    return "\n".join(f"{us / 1000:8.1f} ms  {name}" for us, name in rows[:count])
+
+
+@pytest.mark.parametrize("package", ["processor", "dashboard"])
+def test_handler_package_defers_pydoover(package):
+    result, _ = probe(package)
+    assert not [m for m in result["modules"] if m.startswith("pydoover")]
+
+
+def test_manager_defers_its_ui():
+    result, _ = probe("processor.application")
+    assert "processor.app_ui" not in result["modules"]
+
+
+@pytest.mark.parametrize("module", ["processor.application", "dashboard.application"])
+def test_cold_start_within_budget(module):
+    result, profile = probe(module)
+
+    assert result["seconds"] < IMPORT_TIME_BUDGET_S, (
+        f"importing {module} took {result['seconds']:.2f}s; slowest imports:\n{profile}"
+    )
+    rss_mb = result["max_rss_kb"] / 1024
+    assert rss_mb < RSS_BUDGET_MB, (
+        f"importing {module} peaked at {rss_mb:.1f} MB; slowest imports:\n{profile}"
+    )
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from maintenance_common.concurrency import gather_isolated
+
+
+@pytest.mark.asyncio
+async def test_runs_concurrently_within_limit():
+    in_flight = peak = 0
+
+    async def call(result):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return result
+
+    results = await gather_isolated(*(call(i) for i in range(6)), limit=3)
+
+    assert results == list(range(6))
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_failure_does_not_cancel_other_calls():
+    finished = []
+
+    async def fail():
+        raise ValueError("flush failed")
+
+    async def succeed():
+        await asyncio.sleep(0.01)
+        finished.append(True)
+
+    with pytest.raises(ValueError, match="flush failed"):
+        await gather_isolated(fail(), succeed())
+
+    assert finished == [True]
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from processor.dedup import WINDOW_SIZE, ProcessedMessages, message_key
+
+TIMESTAMP = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class Message:
+    def __init__(self, id, timestamp=TIMESTAMP):
+        self.id = id
+        self.timestamp = timestamp
+
+
+def test_message_key_uses_id_and_timestamp():
+    assert message_key(Message(7)) == f"7:{int(TIMESTAMP.timestamp() * 1000)}"
+    assert message_key(Message(None)) is None
+
+
+def test_window_keeps_most_recent_keys():
+    processed = ProcessedMessages()
+    for i in range(WINDOW_SIZE + 5):
+        processed.add(f"m{i}")
+
+    assert "m0" not in processed
+    assert f"m{WINDOW_SIZE + 4}" in processed
+    assert len(processed.keys) == WINDOW_SIZE
+
+    # seeing a key again makes it the most recent
+    processed.add("m5")
+    processed.add("new")
+    assert "m5" in processed
+    assert "m6" not in processed
+
+
+def test_older_readings_are_out_of_order():
+    processed = ProcessedMessages()
+    processed.add("a", reading_ms=2000)
+
+    assert processed.is_out_of_order(1000)
+    assert not processed.is_out_of_order(2000)
+
+    # an older reading never moves the newest one back
+    processed.add("b", reading_ms=1000)
+    assert processed.reading_at == 2000
+
+
+def test_round_trips_through_tag():
+    processed = ProcessedMessages(["a", "b"], 1234)
+    restored = ProcessedMessages.from_tag(processed.to_tag())
+
+    assert restored.keys == ["a", "b"]
+    assert restored.reading_at == 1234
+    assert ProcessedMessages.from_tag("junk").keys == []
+    assert None not in ProcessedMessages()
+
+
+@pytest.mark.asyncio
+async def test_redelivered_message_is_skipped(fakes):
+    api = fakes.FakeDooverAPI()
+    fakes.seed_device(api)
+    event = fakes.tracker_event(1000.0, 20000.0)
+
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+    await app.on_message_create(event)
+
+    api.reset_counters()
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+    await app.on_message_create(event)
+
+    assert api.total_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_message_writes_nothing_and_is_retried(fakes):
+    api = fakes.FakeDooverAPI()
+    fakes.seed_device(api)
+    event = fakes.tracker_event(1000.0, 20000.0)
+
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+
+    def fail(*args, **kwargs):
+        raise ValueError("forecast failed")
+
+    app._forecast_service = fail
+    api.reset_counters()
+    with pytest.raises(ValueError, match="forecast failed"):
+        await app.on_message_create(event)
+
+    assert api.calls["update_aggregate"] == 0
+    assert fakes.APP_KEY not in api.aggregate(fakes.AGENT_ID, "tag_values")
+
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+    await app.on_message_create(event)
+
+    assert api.aggregate(fakes.AGENT_ID, "tag_values")[fakes.APP_KEY]["engine_hours"]
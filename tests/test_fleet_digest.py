@@ -0,0 +1,126 @@
+import pytest
+
+from dashboard.fleet_digest import (
+    DIGEST_CHANNEL,
+    digest_entry,
+    digest_patch,
+    fleet_device_ids,
+)
+
+
+def test_digest_entry_keeps_only_digest_tags():
+    entry = digest_entry(
+        {"next_service_est": 1_700_000_000_000, "engine_hours": 10, "daily_usage": {}}
+    )
+    assert entry == {"next_service_est": 1_700_000_000_000}
+
+
+def test_digest_entry_without_digest_tags():
+    assert digest_entry({"engine_hours": 10}) is None
+    assert digest_entry(None) is None
+
+
+def test_digest_patch_sends_only_changes():
+    digest = {
+        "devices": {
+            "2": {"next_service_est": 20, "date_due": 25},
+            "3": {"next_service_est": 10},
+            "4": {"next_service_est": 30},
+        },
+        "index": [[10, "3"], [20, "2"], [30, "4"]],
+    }
+    entries = {
+        # a tag that has gone is cleared
+        "2": {"next_service_est": 20},
+        "3": {"next_service_est": 40},
+        "5": {"next_service_est": 5},
+    }
+
+    assert digest_patch(digest, entries) == {
+        "devices": {
+            "2": {"date_due": None, "next_service_est": 20},
+            "3": {"next_service_est": 40},
+            "4": None,
+            "5": {"next_service_est": 5},
+        },
+        "index": [[5, "5"], [20, "2"], [40, "3"]],
+    }
+    assert digest_patch(digest, digest["devices"]) is None
+
+
+def test_digest_patch_builds_a_missing_index():
+    entries = {"2": {"next_service_est": 20}, "3": {"next_service_est": 10}}
+    assert digest_patch({"devices": entries}, entries) == {
+        "index": [[10, "3"], [20, "2"]]
+    }
+
+
+def test_fleet_device_ids_excludes_dashboard():
+    config = {
+        "applications": {
+            "dashboard_1": {"DEVICE_MAP": {"1": "Dashboard", "2": "Truck", "x": "?"}}
+        }
+    }
+    assert fleet_device_ids(config, "dashboard_1", 1) == [2]
+    assert fleet_device_ids({}, "dashboard_1", 1) == []
+
+
+@pytest.mark.asyncio
+async def test_deployment_builds_digest_from_device_map(fakes):
+    api = fakes.FakeDooverAPI()
+    api.aggregate(1, "deployment_config")["applications"] = {
+        fakes.DASHBOARD_APP_KEY: {
+            "DEVICE_MAP": {"1": "Dashboard", "2": "Truck", "3": "Loader", "4": "Ute"}
+        }
+    }
+    api.aggregate(2, "tag_values")[fakes.APP_KEY] = {
+        "next_service_est": 20,
+        "engine_hours": 10,
+    }
+    api.aggregate(3, "tag_values")[fakes.APP_KEY] = {"next_service_est": 10}
+
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_aggregate_update(fakes.FakeAggregateEvent(1, "deployment_config", {}))
+
+    digest = api.aggregate(1, DIGEST_CHANNEL)
+    assert digest["devices"] == {
+        "2": {"next_service_est": 20},
+        "3": {"next_service_est": 10},
+    }
+    assert digest["index"] == [[10, "3"], [20, "2"]]
+
+
+@pytest.mark.asyncio
+async def test_schedule_reads_changed_devices_into_the_digest(fakes):
+    api = fakes.FakeDooverAPI()
+    api.aggregate(1, "deployment_config")["applications"] = {
+        fakes.DASHBOARD_APP_KEY: {"DEVICE_MAP": {"2": "Truck", "3": "Loader"}}
+    }
+    api.aggregate(2, "tag_values")[fakes.APP_KEY] = {"next_service_est": 20}
+    api.aggregate(3, "tag_values")[fakes.APP_KEY] = {"next_service_est": 10}
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+
+    # the managers' tags change without telling the dashboard
+    api.aggregate(3, "tag_values")[fakes.APP_KEY]["next_service_est"] = 30
+    written = []
+    api.listeners.append(lambda *update: written.append(update))
+
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+    assert written == [
+        (
+            1,
+            DIGEST_CHANNEL,
+            {
+                "devices": {"3": {"next_service_est": 30}},
+                "index": [[20, "2"], [30, "3"]],
+            },
+        )
+    ]
+
+    # nothing is written when nothing changed
+    written.clear()
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+    assert written == []
@@ -0,0 +1,54 @@
+from dashboard.fleet_index import FleetIndex
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def test_built_from_each_devices_sort_key():
+    devices = {
+        "3": {"next_service_est": 30 * DAY_MS},
+        "1": {"next_service_est": 10 * DAY_MS},
+        "2": {"hours_till_next_service": 5},
+        "4": {"next_service_est": None},
+    }
+    index = FleetIndex.build(devices)
+    assert index.to_list() == [[10 * DAY_MS, "1"], [30 * DAY_MS, "3"]]
+    assert len(FleetIndex.build(None)) == 0
+
+
+def test_read_from_digest_in_stored_order():
+    digest = {"index": [[10 * DAY_MS, "1"], [30 * DAY_MS, "3"]]}
+    assert FleetIndex.from_digest(digest).to_list() == digest["index"]
+    assert len(FleetIndex.from_digest({"index": [["junk"]]})) == 0
+    assert len(FleetIndex.from_digest(None)) == 0
+
+
+def test_move_repositions_one_device():
+    index = FleetIndex.build(
+        {str(day): {"next_service_est": day * DAY_MS} for day in range(5)}
+    )
+
+    assert index.move(1, 1 * DAY_MS, 10 * DAY_MS)
+    assert [device_id for _, device_id in index.entries] == ["0", "2", "3", "4", "1"]
+
+    # unchanged estimates leave the index alone
+    assert not index.move(1, 10 * DAY_MS, 10 * DAY_MS)
+
+    # a device new to the index is inserted, and one without an estimate
+    # any more is removed
+    assert index.move(7, None, 2.5 * DAY_MS)
+    assert index.move(3, 3 * DAY_MS, None)
+    assert [device_id for _, device_id in index.entries] == ["0", "2", "7", "4", "1"]
+
+
+def test_move_finds_a_device_whose_previous_estimate_disagrees():
+    index = FleetIndex([(1, "a"), (2, "b")])
+    assert index.move("a", 5, 3)
+    assert index.to_list() == [[2, "b"], [3, "a"]]
+
+
+def test_top_k_and_range_queries():
+    index = FleetIndex((day * DAY_MS, str(day)) for day in range(100))
+
+    assert [device_id for _, device_id in index.top(3)] == ["0", "1", "2"]
+    due = index.due_between(10 * DAY_MS, 14 * DAY_MS)
+    assert [device_id for _, device_id in due] == ["10", "11", "12", "13"]
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from processor import forecast
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_next_service_thresholds():
+    last_date = NOW - timedelta(days=10)
+    hours, kms, date = forecast.next_service_thresholds(
+        100, 1000, last_date, 250, 5000, 2.5
+    )
+    assert (hours, kms) == (350, 6000)
+    # partial months round up to whole 30 day months
+    assert date == last_date + timedelta(days=90)
+
+
+def test_unset_intervals_give_no_thresholds():
+    assert forecast.next_service_thresholds(100, 1000, NOW, None, None, None) == (
+        None,
+        None,
+        None,
+    )
+    assert forecast.service_interval_days(0) is None
+
+
+def test_estimate_takes_earliest_limit():
+    est = forecast.estimate_next_service(
+        NOW,
+        curr_hours=300,
+        curr_odo=5000,
+        ave_hours_per_day=5,
+        ave_kms_per_day=100,
+        next_service_hours=350,  # 10 days away
+        next_service_kms=6000,  # 10 days away
+        next_service_date=NOW + timedelta(days=4),
+    )
+    assert est == NOW + timedelta(days=4)
+    assert forecast.days_until(est, NOW) == 4
+
+
+def test_due_dates_are_projected_per_limit():
+    due = forecast.due_dates(NOW, 300, 5000, 5, 0, 350, 6000, NOW + timedelta(days=4))
+
+    assert due == {
+        "hours": NOW + timedelta(days=10),
+        # an idle odometer never reaches its threshold
+        "kms": None,
+        "date": NOW + timedelta(days=4),
+    }
+    assert forecast.earliest_due(due) == NOW + timedelta(days=4)
+    assert forecast.earliest_due(dict.fromkeys(due)) is None
+
+
+def test_estimate_ignores_idle_rates():
+    est = forecast.estimate_next_service(NOW, 300, 5000, 0, None, 350, 6000, None)
+    assert est is None
+
+
+def test_projection_too_far_off_is_left_out():
+    # a parked machine that moved 0.1 km in a 90 day window would take
+    # millions of years to reach its next service
+    due = forecast.due_dates(
+        NOW, 300, 5000, 5, 0.1 / 90, 350, 10_000, NOW + timedelta(days=4)
+    )
+    assert due["kms"] is None
+    assert forecast.earliest_due(due) == NOW + timedelta(days=4)
+
+    # and the batch leaves it out the same way
+    batch = forecast.estimate_next_service_batch(
+        NOW.timestamp() * 1000,
+        300,
+        5000,
+        5,
+        0.1 / 90,
+        100,
+        5000,
+        np.nan,
+        250,
+        5000,
+        np.nan,
+    )
+    assert batch == pytest.approx((NOW + timedelta(days=10)).timestamp() * 1000)
+
+
+def test_batch_matches_single_machine_estimates():
+    now_ms = NOW.timestamp() * 1000
+    last_date = NOW - timedelta(days=20)
+    machines = [
+        # hours, odo, h/day, km/day, last hours, last kms
+        (300, 5000, 5, 100, 100, 1000),
+        (120, 900, 0, 0, 100, 800),
+        (400, 7000, 8, 50, 300, 6900),
+    ]
+    hours, odo, hours_rate, kms_rate, last_hours, last_kms = map(
+        np.array, zip(*machines)
+    )
+
+    due = forecast.estimate_next_service_batch(
+        now_ms,
+        hours,
+        odo,
+        hours_rate,
+        kms_rate,
+        last_hours,
+        last_kms,
+        last_date.timestamp() * 1000,
+        interval_hours=250,
+        interval_kms=5000,
+        interval_months=np.nan,
+    )
+
+    for i, machine in enumerate(machines):
+        h, o, hr, kr, lh, lk = machine
+        next_hours, next_kms, _ = forecast.next_service_thresholds(
+            lh, lk, last_date, 250, 5000, None
+        )
+        expected = forecast.estimate_next_service(
+            NOW, h, o, hr, kr, next_hours, next_kms, None
+        )
+        if expected is None:
+            assert np.isnan(due[i])
+        else:
+            assert due[i] == pytest.approx(expected.timestamp() * 1000)
+
+
+def test_batch_applies_month_interval():
+    last_date_ms = NOW.timestamp() * 1000
+    due = forecast.estimate_next_service_batch(
+        last_date_ms,
+        np.zeros(2),
+        np.zeros(2),
+        np.zeros(2),
+        np.zeros(2),
+        np.zeros(2),
+        np.zeros(2),
+        last_date_ms,
+        np.nan,
+        np.nan,
+        np.array([1, 6]),
+    )
+    assert list(due) == [
+        last_date_ms + 30 * forecast.DAY_MS,
+        last_date_ms + 180 * forecast.DAY_MS,
+    ]
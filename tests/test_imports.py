@@ -16,8 +16,4 @@ def test_config():
 
 def test_ui():
     from processor.app_ui import MaintenanceManagerUI
-    assert MaintenanceManagerUI
-
-def test_state():
-    from processor.app_state import MaintenanceManagerState
-    assert MaintenanceManagerState
\ No newline at end of file
+    assert MaintenanceManagerUI
\ No newline at end of file
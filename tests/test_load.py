@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture
+def load():
+    from tests import load
+
+    return load
+
+
+def test_synthetic_fleet_follows_profile_weights(load):
+    fleet = load.synthetic_fleet(30, profiles={"haulage": 1})
+
+    assert len(fleet) == 30
+    assert len({device.agent_id for device in fleet}) == 30
+    assert all(device.profile is load.USAGE_PROFILES["haulage"] for device in fleet)
+
+
+def test_traffic_is_in_time_order(load):
+    import random
+
+    from datetime import datetime, timezone
+
+    fleet = load.synthetic_fleet(5)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    messages = list(load.traffic(fleet, start, 6, 4, random.Random(0)))
+
+    assert len(messages) == 5 * 6 * 4
+    timestamps = [timestamp for timestamp, _, _ in messages]
+    assert timestamps == sorted(timestamps)
+
+
+@pytest.mark.asyncio
+async def test_load_run_reports_every_invocation(load):
+    report = await load.run_load(devices=3, hours=12, messages_per_hour=2)
+
+    assert len(report.latencies_ms["manager"]) == 3 * 12 * 2
+    assert report.latencies_ms["dashboard"]
+    assert report.calls_per_device_hour > 0
+    assert "API calls per device-hour" in report.format()
+
+
+@pytest.mark.asyncio
+async def test_throttling_reduces_calls_per_device_hour(load):
+    unthrottled = await load.run_load(devices=3, hours=12, messages_per_hour=4)
+    throttled = await load.run_load(
+        devices=3, hours=12, messages_per_hour=4, min_recompute_interval=60
+    )
+
+    assert throttled.calls_per_device_hour < unthrottled.calls_per_device_hour
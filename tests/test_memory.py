@@ -0,0 +1,92 @@
+import asyncio
+import io
+import json
+import tracemalloc
+
+from datetime import datetime, timedelta, timezone
+
+from maintenance_common.metrics import InvocationMetrics
+from processor.replay import iter_api_readings, replay_async
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PAGE_SIZE = 1000
+
+# the 128 MB Lambda also holds the interpreter, pydoover and the event, so
+# replaying history has to stay well within what's left
+HISTORY_BUDGET_BYTES = 16 * 1024 * 1024
+
+
+class Message:
+    def __init__(self, timestamp, data):
+        self.timestamp = timestamp
+        self.data = data
+
+
+class BulkyHistoryAPI:
+    """
+    Minute-by-minute history where every message also carries other apps'
+    data, built a page at a time so the fake itself holds nothing between calls.
+    """
+
+    def __init__(self, count):
+        self.count = count
+
+    async def get_channel_messages(self, agent_id, channel_name, after, limit, **kw):
+        first = max(0, int((after - START).total_seconds() // 60))
+        return [
+            Message(
+                START + timedelta(minutes=i),
+                {
+                    "tracker_1": {"run_hours": i / 60, "odometer_km": i * 0.5},
+                    "other_app": {"payload": "x" * 1024, "values": list(range(50))},
+                },
+            )
+            for i in range(first, min(first + limit, self.count))
+        ]
+
+
+def peak_replaying(pages):
+    api = BulkyHistoryAPI(pages * PAGE_SIZE)
+    tracemalloc.start()
+    try:
+        readings = iter_api_readings(api, 1, "tracker_1", START, page_size=PAGE_SIZE)
+        usage = asyncio.run(replay_async(readings))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return usage, peak
+
+
+def test_history_replay_peak_memory_stays_within_budget():
+    usage, peak = peak_replaying(20)
+
+    assert not usage.is_empty
+    assert peak < HISTORY_BUDGET_BYTES
+
+
+def test_history_replay_holds_one_page_at_a_time():
+    _, short_peak = peak_replaying(2)
+    _, long_peak = peak_replaying(20)
+
+    # ten times the history shouldn't need much more than a page's worth
+    assert long_peak < short_peak * 1.5
+
+
+def test_peak_memory_reported_when_tracing():
+    stream = io.StringIO()
+    metrics = InvocationMetrics("test", enabled=True, stream=stream, trace_memory=True)
+    buffer = bytearray(1024 * 1024)
+    del buffer
+    metrics.emit()
+
+    line = json.loads(stream.getvalue())
+    assert line["peak_memory_bytes"] >= 1024 * 1024
+    assert not tracemalloc.is_tracing()
+
+
+def test_peak_memory_not_reported_by_default():
+    stream = io.StringIO()
+    metrics = InvocationMetrics("test", enabled=True, stream=stream, trace_memory=False)
+    metrics.emit()
+
+    assert "peak_memory_bytes" not in json.loads(stream.getvalue())
@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+
+from maintenance_common.metrics import InvocationMetrics
+
+
+class RecordingAPI:
+    async def update_aggregate(self, agent_id, channel_name, data, **kwargs):
+        return None
+
+    def describe(self):
+        return "not counted"
+
+
+def emitted(stream):
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    return json.loads(lines[0])
+
+
+@pytest.mark.asyncio
+async def test_emits_one_emf_line_with_spans_and_calls():
+    stream = io.StringIO()
+    metrics = InvocationMetrics("manager", enabled=True, stream=stream)
+    api = metrics.instrument(RecordingAPI())
+
+    with metrics.span("forecast"):
+        await api.update_aggregate(1, "tag_values", {"manager": {"a": 1}})
+        await api.update_aggregate(1, "tag_values", {"manager": {"a": 2}})
+    assert api.describe() == "not counted"
+    metrics.set_property("skipped", "throttled")
+    metrics.emit()
+
+    line = emitted(stream)
+    names = {m["Name"] for m in line["_aws"]["CloudWatchMetrics"][0]["Metrics"]}
+    assert {"invocation_ms", "api_calls", "api_bytes", "forecast_ms"} <= names
+    assert line["App"] == "manager"
+    assert line["api_calls"] == 2
+    assert line["api_calls_by_method"] == {"update_aggregate": 2}
+    assert line["api_bytes"] > 0
+    assert line["forecast_ms"] >= 0
+    assert line["skipped"] == "throttled"
+
+
+def test_disabled_is_a_no_op():
+    stream = io.StringIO()
+    metrics = InvocationMetrics("manager", enabled=False, stream=stream)
+    api = RecordingAPI()
+
+    assert metrics.instrument(api) is api
+    with metrics.span("forecast"):
+        pass
+    metrics.emit()
+
+    assert metrics.spans == {}
+    assert stream.getvalue() == ""
+
+
+def test_enabled_from_environment(monkeypatch):
+    monkeypatch.setenv("MAINTENANCE_METRICS", "1")
+    assert InvocationMetrics("manager").enabled
+    monkeypatch.delenv("MAINTENANCE_METRICS")
+    assert not InvocationMetrics("manager").enabled
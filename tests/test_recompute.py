@@ -0,0 +1,151 @@
+import pytest
+
+from processor import recompute
+
+
+def test_tracker_message_recomputes_everything():
+    assert recompute.affected(recompute.ALL_INPUTS) == set(recompute.DEPENDENCIES)
+
+
+def test_set_kms_leaves_hours_and_rates_alone():
+    stale = recompute.affected(recompute.command_inputs({"setKms": 20000}, "app"))
+
+    assert stale == {
+        recompute.MACHINE_ODOMETER,
+        recompute.KMS_DUE,
+        recompute.NEXT_SERVICE,
+    }
+
+
+def test_averaging_window_moves_both_meter_limits_but_not_the_date():
+    stale = recompute.affected(recompute.command_inputs({"app_aveCalcDays": 30}, "app"))
+
+    assert stale == {
+        recompute.USAGE_RATES,
+        recompute.HOURS_DUE,
+        recompute.KMS_DUE,
+        recompute.NEXT_SERVICE,
+    }
+
+
+def test_service_reset_moves_every_limit_but_not_the_meters():
+    stale = recompute.affected({recompute.LAST_SERVICE})
+
+    assert stale == {
+        recompute.HOURS_DUE,
+        recompute.KMS_DUE,
+        recompute.DATE_DUE,
+        recompute.NEXT_SERVICE,
+    }
+
+
+def test_unknown_commands_change_nothing():
+    assert recompute.affected(recompute.command_inputs({"other": 1}, "app")) == set()
+
+
+@pytest.mark.asyncio
+async def test_set_kms_skips_rates_and_hours_outputs(fakes):
+    api = fakes.FakeDooverAPI()
+    await fakes.first_message(api)
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+
+    written = {}
+
+    def record_writes(agent_id, channel_name, data):
+        if channel_name == "tag_values":
+            written.update(data.get(fakes.APP_KEY, {}))
+
+    api.listeners.append(record_writes)
+    api.reset_counters()
+    await app.on_message_create(fakes.ui_cmd_event({"setKms": 25000}))
+
+    assert api.calls["get_channel_messages"] == 0
+    assert "daily_usage" not in written
+    assert written["machine_odometer"] == 25000
+    assert not {"engine_hours", "hours_due_est", "hours_till_next_service"} & set(
+        written
+    )
+
+
+@pytest.mark.asyncio
+async def test_set_kms_leaves_a_deferred_hours_reading(fakes):
+    api = fakes.FakeDooverAPI()
+    await fakes.first_message(api)
+    tags = api.aggregate(fakes.AGENT_ID, "tag_values")[fakes.APP_KEY]
+
+    # the tracker has moved since the last forecast, but only the odometer
+    # offset changes, so the hours stay as forecast
+    fakes.set_tracker(api, 1002.0, 20050.0)
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+    await app.on_message_create(fakes.ui_cmd_event({"setKms": 25000}))
+
+    assert tags["engine_hours"] == 1000.0
+    assert tags["machine_odometer"] == 25000
+
+
+@pytest.mark.asyncio
+async def test_schedule_applies_a_deferred_reading(fakes):
+    api = fakes.FakeDooverAPI()
+    await fakes.first_message(api)
+    config = {**fakes.INTERVALS, "min_recompute_interval": 5.0}
+    tags = api.aggregate(fakes.AGENT_ID, "tag_values")[fakes.APP_KEY]
+
+    # a small move soon after the last forecast is deferred
+    fakes.set_tracker(api, 1000.5, 20010.0)
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+    await app.on_message_create(fakes.tracker_event(1000.5, 20010.0))
+    assert tags["engine_hours"] == 1000.0
+
+    # and applied by the next scheduled run, if nothing else comes first
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+    await app.on_schedule(None)
+    assert tags["engine_hours"] == 1000.5
+    assert tags["machine_odometer"] == 20010.0
+
+    api.reset_counters()
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+    await app.on_schedule(None)
+    assert api.total_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_ui_commands_bypass_the_recompute_interval(fakes):
+    api = fakes.FakeDooverAPI()
+    await fakes.first_message(api)
+    config = {**fakes.INTERVALS, "min_recompute_interval": 5.0}
+    tags = api.aggregate(fakes.AGENT_ID, "tag_values")[fakes.APP_KEY]
+
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+    event = fakes.ui_cmd_event({"setKms": 25000})
+    assert not app._is_throttled(event)
+
+    await app.on_message_create(event)
+    assert tags["machine_odometer"] == 25000
+
+
+@pytest.mark.asyncio
+async def test_meter_jumps_bypass_the_recompute_interval(fakes):
+    from processor.application import RECOMPUTE_JUMP_HOURS, RECOMPUTE_JUMP_KMS
+
+    api = fakes.FakeDooverAPI()
+    await fakes.first_message(api)
+    config = {**fakes.INTERVALS, "min_recompute_interval": 5.0}
+    tags = api.aggregate(fakes.AGENT_ID, "tag_values")[fakes.APP_KEY]
+
+    for run_hours, odometer_km in (
+        (1000.0 + RECOMPUTE_JUMP_HOURS, 20000.0),
+        (1000.0 + RECOMPUTE_JUMP_HOURS, 20000.0 + RECOMPUTE_JUMP_KMS),
+    ):
+        fakes.set_tracker(api, run_hours, odometer_km)
+        app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+        event = fakes.tracker_event(run_hours, odometer_km)
+        assert not app._is_throttled(event)
+
+        await app.on_message_create(event)
+        assert tags["engine_hours"] == run_hours
+        assert tags["machine_odometer"] == odometer_km
+
+    # a smaller move is still deferred
+    fakes.set_tracker(api, 1001.5, 20030.0)
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **config)
+    assert app._is_throttled(fakes.tracker_event(1001.5, 20030.0))
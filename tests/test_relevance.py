@@ -0,0 +1,61 @@
+import pytest
+
+
+async def manager_after_first_message(fakes):
+    api = fakes.FakeDooverAPI()
+    await fakes.first_message(api)
+    app = await fakes.make_manager(api, fakes.AGENT_ID, **fakes.INTERVALS)
+    return api, app
+
+
+@pytest.mark.asyncio
+async def test_other_channels_are_irrelevant(fakes):
+    api, app = await manager_after_first_message(fakes)
+    event = fakes.FakeEvent(fakes.AGENT_ID, "location", {"lat": -33.9, "lon": 151.2})
+    assert not app._is_relevant(event)
+
+    api.reset_counters()
+    await app.on_message_create(event)
+    assert api.total_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_tag_values_without_the_meters_are_irrelevant(fakes):
+    _, app = await manager_after_first_message(fakes)
+
+    # another app's tags, and the tracker's other tags
+    for data in (
+        {"other_app_1": {"run_hours": 5000.0}},
+        {fakes.TRACKER_KEY: {"battery_voltage": 12.6}},
+        {fakes.TRACKER_KEY: "offline"},
+    ):
+        assert not app._is_relevant(fakes.FakeEvent(fakes.AGENT_ID, "tag_values", data))
+
+
+@pytest.mark.asyncio
+async def test_unchanged_meters_are_irrelevant(fakes):
+    api, app = await manager_after_first_message(fakes)
+    assert not app._is_relevant(fakes.tracker_event(1000.0, 20000.0))
+    # either meter moving is enough
+    assert app._is_relevant(fakes.tracker_event(1000.0, 20000.5))
+    assert app._is_relevant(fakes.tracker_event(1000.1, 20000.0))
+
+    api.reset_counters()
+    await app.on_message_create(fakes.tracker_event(1000.0, 20000.0))
+    assert api.total_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_ui_commands_under_the_app_key_prefix_are_relevant(fakes):
+    api, app = await manager_after_first_message(fakes)
+    prefixed = fakes.FakeEvent(
+        fakes.AGENT_ID, "ui_cmds", {f"{fakes.APP_KEY}_setKms": 25000}
+    )
+    assert app._is_relevant(prefixed)
+    assert app._is_relevant(fakes.ui_cmd_event({"setKms": 25000}))
+    # commands that can't change the forecast
+    assert not app._is_relevant(fakes.ui_cmd_event({"position": 3}))
+
+    await app.on_message_create(prefixed)
+    tags = api.aggregate(fakes.AGENT_ID, "tag_values")[fakes.APP_KEY]
+    assert tags["machine_odometer"] == 25000
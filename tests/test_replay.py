@@ -0,0 +1,156 @@
+import json
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from processor.replay import (
+    backfill,
+    iter_api_readings,
+    iter_file_readings,
+    main,
+    replay,
+    replay_async,
+)
+from processor.usage import DAY_MS, DailyUsage
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Message:
+    def __init__(self, timestamp, data):
+        self.timestamp = timestamp
+        self.data = data
+
+
+class PagedAPI:
+    def __init__(self, messages, aggregates=None):
+        self.messages = messages
+        self.aggregates = aggregates or {}
+        self.pages = 0
+        self.updates = []
+
+    async def get_channel_messages(self, agent_id, channel_name, after, limit, **kw):
+        self.pages += 1
+        return [m for m in self.messages if m.timestamp >= after][:limit]
+
+    async def fetch_channel_aggregate(self, agent_id, channel_name):
+        return self.aggregates.get(channel_name, {})
+
+    async def update_aggregate(self, agent_id, channel_name, data, **kwargs):
+        self.updates.append((agent_id, channel_name, data))
+
+
+def hourly_messages(count):
+    return [
+        Message(
+            START + timedelta(hours=i),
+            {"tracker_1": {"run_hours": i * 0.5, "odometer_km": i * 10.0}},
+        )
+        for i in range(count)
+    ]
+
+
+def test_file_replay_matches_live_recording(tmp_path):
+    messages = hourly_messages(24 * 30)
+    export = tmp_path / "export.jsonl"
+    with export.open("w") as f:
+        for m in messages:
+            line = {"timestamp": m.timestamp.isoformat(), "data": m.data}
+            f.write(json.dumps(line) + "\n")
+        # messages without a tracker reading are skipped
+        f.write(json.dumps({"timestamp": 0, "data": {"other": {}}}) + "\n")
+
+    live = DailyUsage()
+    for m in messages:
+        tracker = m.data["tracker_1"]
+        live.record(
+            int(m.timestamp.timestamp() * 1000),
+            tracker["run_hours"],
+            tracker["odometer_km"],
+        )
+
+    replayed = replay(iter_file_readings(export, "tracker_1"))
+    assert replayed.to_tag() == live.to_tag()
+
+
+@pytest.mark.asyncio
+async def test_api_replay_pages_without_repeats():
+    api = PagedAPI(hourly_messages(25))
+    readings = iter_api_readings(api, 1, "tracker_1", START, page_size=10)
+
+    usage = await replay_async(readings)
+
+    assert api.pages == 3
+    assert usage.last == (int(START.timestamp() * 1000) + DAY_MS, 12, 240)
+    assert usage.usage_between(usage.first_day, usage.first_day + 1) == (12, 240)
+
+
+def test_cli_prints_one_tag_update(tmp_path, capsys):
+    export = tmp_path / "export.jsonl"
+    export.write_text(
+        "\n".join(
+            json.dumps({"timestamp": ts, "data": {"tracker_1": {"run_hours": h}}})
+            for ts, h in [(0, 0), (DAY_MS, 8), (2 * DAY_MS, 16)]
+        )
+    )
+
+    assert main([str(export), "--window-days", "2"]) == 0
+
+    update = json.loads(capsys.readouterr().out)
+    tags = update["maintenance_manager_1"]
+    assert tags["ave_hours_per_day"] == pytest.approx(8)
+    assert tags["daily_usage"]["last"] == [2 * DAY_MS, 16, None]
+
+
+@pytest.mark.asyncio
+async def test_backfill_writes_final_tags_once():
+    last_service = START + timedelta(days=20)
+    api = PagedAPI(
+        hourly_messages(24 * 30),
+        {
+            "tag_values": {
+                "maintenance_manager_1": {
+                    "hours_offset": 100,
+                    "last_service_hours": 300,
+                    "last_service_date": int(last_service.timestamp() * 1000),
+                    "oil_service_last_service_hours": 250,
+                }
+            },
+            "deployment_config": {
+                "applications": {
+                    "maintenance_manager_1": {
+                        "service_interval_(hours)": 250,
+                        "additional_service_schedules": [
+                            {"name": "Oil Service", "interval_(hours)": 500}
+                        ],
+                    }
+                }
+            },
+        },
+    )
+
+    update = await backfill(
+        api, 1, "maintenance_manager_1", "tracker_1", 14, after=START
+    )
+
+    assert api.updates == [(1, "tag_values", update)]
+    tags = update["maintenance_manager_1"]
+    assert tags["daily_usage"]["last"][1] == pytest.approx(359.5)
+    assert tags["engine_hours"] == pytest.approx(459.5)
+    assert tags["ave_hours_per_day"] == pytest.approx(12)
+    assert tags["hours_till_next_service"] == pytest.approx(90.5)
+    assert tags["next_service_est"] == tags["hours_due_est"]
+    assert tags["oil_service_hours_till_next_service"] == pytest.approx(290.5)
+
+
+@pytest.mark.asyncio
+async def test_backfill_dry_run_writes_nothing():
+    api = PagedAPI(hourly_messages(48))
+
+    update = await backfill(
+        api, 1, "maintenance_manager_1", "tracker_1", 14, START, dry_run=True
+    )
+
+    assert api.updates == []
+    assert update["maintenance_manager_1"]["engine_hours"] == pytest.approx(23.5)
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from processor.resilience import CircuitBreaker, RetryBudget
+
+
+@pytest.mark.asyncio
+async def test_retries_until_success():
+    attempts = []
+
+    async def flaky():
+        attempts.append(True)
+        if len(attempts) < 3:
+            raise ConnectionError("history API unavailable")
+        return "page"
+
+    budget = RetryBudget(1.0, attempts=3, base_delay_s=0.001)
+    assert await budget.call(flaky) == "page"
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_attempts():
+    async def failing():
+        raise ConnectionError("history API unavailable")
+
+    budget = RetryBudget(1.0, attempts=2, base_delay_s=0.001)
+    with pytest.raises(ConnectionError):
+        await budget.call(failing)
+
+
+@pytest.mark.asyncio
+async def test_attempts_shared_across_calls():
+    calls = []
+
+    async def fails_once():
+        calls.append(True)
+        if len(calls) % 2:
+            raise ConnectionError("history API unavailable")
+        return "page"
+
+    budget = RetryBudget(1.0, attempts=2, base_delay_s=0.001)
+    assert await budget.call(fails_once) == "page"
+
+    # the first page used up the retry, so the next failure is final
+    with pytest.raises(ConnectionError):
+        await budget.call(fails_once)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_call_cut_off_at_budget():
+    async def slow():
+        await asyncio.sleep(1)
+
+    budget = RetryBudget(0.05, attempts=3, base_delay_s=0.001)
+    with pytest.raises(TimeoutError):
+        await budget.call(slow)
+    assert budget.remaining_s <= 0.01
+
+
+def test_breaker_opens_after_threshold_and_cools_down():
+    breaker = CircuitBreaker(threshold=2, cooldown_ms=1000)
+    breaker.record_failure(0)
+    assert breaker.allow(0)
+
+    breaker.record_failure(0)
+    assert not breaker.allow(999)
+    assert breaker.allow(1000)
+
+    # a failed trial call after the cool-down opens it again straight away
+    breaker.record_failure(1000)
+    assert not breaker.allow(1500)
+
+    breaker.record_success()
+    assert breaker.allow(1500)
+
+
+def test_breaker_round_trips_through_tag():
+    breaker = CircuitBreaker(failures=3, open_until=5000)
+    restored = CircuitBreaker.from_tag(breaker.to_tag())
+    assert (restored.failures, restored.open_until) == (3, 5000)
+
+    assert CircuitBreaker.from_tag(None).allow(0)
+    assert CircuitBreaker.from_tag({"failures": "x"}).allow(0)
@@ -0,0 +1,36 @@
+from maintenance_common.schedules import ServiceSchedule, parse_schedules, schedule_key
+
+
+def test_schedule_key_is_tag_safe():
+    assert schedule_key("Oil Service") == "oil_service"
+    assert schedule_key(" 12-Month  Inspection! ") == "12_month_inspection"
+
+
+def test_schedule_tags_and_action():
+    schedule = ServiceSchedule("Major Service", interval_hours=1000)
+    assert schedule.prefix == "major_service_"
+    assert schedule.reset_action == "reset_major_service_service"
+
+
+def test_parse_schedules():
+    schedules = parse_schedules(
+        [
+            {"name": "Oil", "interval_(hours)": 250},
+            {"name": "Inspection", "interval_(months)": 12, "interval_(kms)": None},
+            # no interval, a clashing name, no name, and not an entry
+            {"name": "Empty", "interval_(hours)": 0},
+            {"name": "oil", "interval_(hours)": 500},
+            {"interval_(hours)": 100},
+            "Major",
+        ]
+    )
+
+    assert [(s.key, s.interval_hours, s.interval_months) for s in schedules] == [
+        ("oil", 250, None),
+        ("inspection", None, 12),
+    ]
+
+
+def test_no_schedules_configured():
+    assert parse_schedules(None) == []
+    assert parse_schedules([]) == []
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from processor.service_log import DAY_MS, MAX_SERVICES, ServiceLog
+
+
+def test_recent_services_newest_first():
+    log = ServiceLog()
+    log.append(0, 100.0, 2000.0)
+    log.append(30 * DAY_MS, 350.25, 7000.5)
+    log.append(60 * DAY_MS, 600.5, 12000.0)
+
+    restored = ServiceLog.from_tag(json.loads(json.dumps(log.to_tag())))
+    assert restored.recent() == [
+        (60 * DAY_MS, 600.5, 12000.0),
+        (30 * DAY_MS, 350.25, 7000.5),
+        (0, 100.0, 2000.0),
+    ]
+    assert restored.recent(1) == [(60 * DAY_MS, 600.5, 12000.0)]
+
+
+def test_mean_interval():
+    log = ServiceLog()
+    assert log.mean_interval() is None
+
+    log.append(0, 0, 0)
+    log.append(20 * DAY_MS, 240, 5000)
+    log.append(60 * DAY_MS, 500, 9000)
+
+    assert log.mean_interval() == pytest.approx({"days": 30, "hours": 250, "kms": 4500})
+
+
+def test_log_is_bounded():
+    log = ServiceLog()
+    for i in range(100):
+        log.append(i * DAY_MS, i * 10, i * 100)
+
+    assert len(log) == MAX_SERVICES
+    assert log.recent()[-1] == ((100 - MAX_SERVICES) * DAY_MS, 800, 8000)
+
+
+def test_unknown_meters_are_kept_unknown():
+    log = ServiceLog()
+    # the first service, before the odometer was known
+    log.append(0, 100, None)
+    log.append(10 * DAY_MS, 300, 5000)
+    log.append(30 * DAY_MS, None, 9000)
+
+    restored = ServiceLog.from_tag(json.loads(json.dumps(log.to_tag())))
+    assert restored.last == (30 * DAY_MS, None, 9000)
+    assert restored.recent() == [
+        (30 * DAY_MS, None, 9000),
+        # counted back from an unknown reading
+        (10 * DAY_MS, None, 5000),
+        (0, None, None),
+    ]
+    # only the gaps with both readings known
+    assert restored.mean_interval() == pytest.approx(
+        {"days": 15, "hours": 200, "kms": 4000}
+    )
+
+
+def test_no_known_gaps():
+    log = ServiceLog()
+    log.append(0, None, None)
+    log.append(DAY_MS, 100, None)
+    assert log.mean_interval() == {"days": 1, "hours": None, "kms": None}
@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+from dashboard.sweep import alert_changes, batches, manager_config
+from maintenance_common.alerts import ALERT_CHANNEL, DUE_SOON, OK, OVERDUE
+
+DAY_MS = 24 * 60 * 60 * 1000
+NOW_MS = 1_800_000_000_000
+
+
+def test_batches():
+    assert list(batches([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+    assert list(batches([], 2)) == []
+
+
+def test_manager_config():
+    config = {"applications": {"manager": {"alert_days_before_service": 3.0}}}
+    assert manager_config(config, "manager") == {"alert_days_before_service": 3.0}
+    assert manager_config(config, "other") == {}
+    assert manager_config(None, "manager") == {}
+
+
+def test_alert_changes_for_time_alone():
+    tags = {
+        "next_service_est": NOW_MS + 3 * DAY_MS + 60_000,
+        "oil_service_next_service_est": NOW_MS - DAY_MS - 60_000,
+        "oil_service_alert_level": DUE_SOON,
+    }
+    config = {"additional_service_schedules": [{"name": "Oil Service"}]}
+    # the schedule has no interval, so isn't forecast
+    assert alert_changes(tags, config, NOW_MS) == (
+        {"alert_level": DUE_SOON},
+        [
+            {
+                "schedule": "Service",
+                "level": DUE_SOON,
+                "previous_level": OK,
+                "message": "Service is due soon",
+                "days_till_next_service": 3,
+                "hours_till_next_service": None,
+                "kms_till_next_service": None,
+            }
+        ],
+    )
+
+    config["additional_service_schedules"][0]["interval_(hours)"] = 250
+    levels, messages = alert_changes(tags, config, NOW_MS)
+    assert levels == {"alert_level": DUE_SOON, "oil_service_alert_level": OVERDUE}
+    assert [m["schedule"] for m in messages] == ["Service", "Oil Service"]
+
+
+def test_alert_changes_use_the_manager_thresholds():
+    tags = {"next_service_est": NOW_MS + 3 * DAY_MS + 60_000}
+    assert alert_changes(tags, {"alert_days_before_service": 2.0}, NOW_MS) == ({}, [])
+    assert alert_changes(tags, {"alert_days_before_service": None}, NOW_MS) == ({}, [])
+    assert alert_changes(None, {}, NOW_MS) == ({}, [])
+
+
+def fleet(api, fakes, device_ids):
+    api.aggregate(1, "deployment_config")["applications"] = {
+        fakes.DASHBOARD_APP_KEY: {"DEVICE_MAP": {str(i): "" for i in device_ids}}
+    }
+
+
+@pytest.mark.asyncio
+async def test_sweep_raises_alerts_for_a_parked_machine(fakes):
+    api = fakes.FakeDooverAPI()
+    fleet(api, fakes, [2])
+    # forecast when the machine last reported, with no message since
+    api.aggregate(2, "tag_values")[fakes.APP_KEY] = {
+        "next_service_est": int(time.time() * 1000) + 3 * DAY_MS + 60_000,
+        "hours_till_next_service": 100,
+    }
+
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+
+    assert api.aggregate(2, "tag_values")[fakes.APP_KEY]["alert_level"] == DUE_SOON
+    [alert] = api.messages[(2, ALERT_CHANNEL)]
+    assert alert.data["level"] == DUE_SOON
+    assert alert.data["days_till_next_service"] == 3
+
+    # the level is unchanged on the next run, so only the reads are made
+    api.reset_counters()
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+    assert api.total_calls == api.calls["fetch_channel_aggregate"] == 4
+
+
+@pytest.mark.asyncio
+async def test_sweep_stops_starting_batches_after_its_budget(monkeypatch, fakes):
+    from dashboard import application
+
+    monkeypatch.setattr(application, "SWEEP_BATCH_SIZE", 2)
+    monkeypatch.setattr(application, "SWEEP_BUDGET_S", 0)
+
+    api = fakes.FakeDooverAPI()
+    fleet(api, fakes, [2, 3, 4, 5])
+    for device_id in (2, 3, 4, 5):
+        api.aggregate(device_id, "tag_values")[fakes.APP_KEY] = {
+            "next_service_est": device_id
+        }
+    # the devices it doesn't reach keep their stored entries
+    api.aggregate(1, "maintenance_digest").update(
+        {"devices": {"5": {"next_service_est": 50}}, "index": [[50, "5"]]}
+    )
+
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+
+    # the first batch is always read
+    assert api.calls["fetch_channel_aggregate"] == 2 + 2 * 2
+    assert api.aggregate(1, "maintenance_digest")["index"] == [
+        [2, "2"],
+        [3, "3"],
+        [50, "5"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sweep_carries_on_past_a_failed_device(fakes):
+    class FailingAPI(fakes.FakeDooverAPI):
+        async def fetch_channel_aggregate(self, agent_id, channel_name):
+            if agent_id == 2:
+                raise ConnectionError("device 2 is unreachable")
+            return await super().fetch_channel_aggregate(agent_id, channel_name)
+
+    api = FailingAPI()
+    fleet(api, fakes, [2, 3])
+    api.aggregate(3, "tag_values")[fakes.APP_KEY] = {"next_service_est": 30}
+    api.aggregate(1, "maintenance_digest").update(
+        {"devices": {"2": {"next_service_est": 20}}, "index": [[20, "2"]]}
+    )
+
+    app = await fakes.make_dashboard(api, 1)
+    await app.on_schedule(None)
+
+    assert api.aggregate(1, "maintenance_digest")["devices"] == {
+        "2": {"next_service_est": 20},
+        "3": {"next_service_est": 30},
+    }
@@ -0,0 +1,69 @@
+import pytest
+
+from processor.tag_session import TagSession
+
+
+class RecordingAPI:
+    def __init__(self):
+        self.calls = []
+
+    async def update_aggregate(self, agent_id, channel_name, data, **kwargs):
+        self.calls.append((agent_id, channel_name, data))
+
+
+def test_reads_served_from_snapshot():
+    session = TagSession(RecordingAPI(), 1, "manager", {"manager": {"a": 1}})
+    assert session.get("a") == 1
+    assert session.get("missing", default=5) == 5
+
+
+def test_missing_app_tags():
+    session = TagSession(RecordingAPI(), 1, "manager", None)
+    assert session.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_writes_buffered_and_flushed_once():
+    api = RecordingAPI()
+    session = TagSession(api, 1, "manager", {"manager": {"a": 1}})
+
+    session.set("a", 2)
+    session.set("b", 3)
+    assert session.get("a") == 2
+    assert api.calls == []
+
+    await session.flush()
+    assert api.calls == [(1, "tag_values", {"manager": {"a": 2, "b": 3}})]
+
+    # nothing pending, so a second flush is free
+    await session.flush()
+    assert len(api.calls) == 1
+    assert session.get("b") == 3
+
+
+@pytest.mark.asyncio
+async def test_unchanged_values_within_tolerance_are_not_written():
+    api = RecordingAPI()
+    session = TagSession(api, 1, "manager", {"manager": {"hours": 100.0, "days": 3}})
+
+    assert session.set("hours", 100.04, tolerance=0.1) is False
+    assert session.set("days", 3) is False
+    assert session.set("missing", None) is False
+    assert session.pending == {}
+
+    assert session.set("hours", 100.2, tolerance=0.1) is True
+    await session.flush()
+    assert api.calls == [(1, "tag_values", {"manager": {"hours": 100.2}})]
+
+
+@pytest.mark.asyncio
+async def test_discarded_writes_are_not_flushed():
+    api = RecordingAPI()
+    session = TagSession(api, 1, "manager", {"manager": {"a": 1}})
+
+    session.set("a", 2)
+    session.discard()
+    assert session.get("a") == 1
+
+    await session.flush()
+    assert api.calls == []
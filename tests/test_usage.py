@@ -0,0 +1,83 @@
+from processor.usage import DAY_MS, MAX_DAYS, DailyUsage
+
+# midnight UTC, so day boundaries are easy to reason about
+NOW = 20_000 * DAY_MS
+
+
+def test_usage_is_bucketed_by_day():
+    usage = DailyUsage()
+    usage.record(NOW, 100, 1000)
+    usage.record(NOW + DAY_MS // 2, 104, 1040)
+    usage.record(NOW + DAY_MS + 1, 110, 1100)
+
+    assert usage.usage_between(20_000, 20_000) == (10, 100)
+    assert usage.usage_between(20_001, 20_001) == (0, 0)
+
+
+def test_gap_is_spread_evenly():
+    usage = DailyUsage()
+    usage.record(NOW, 100, 1000)
+    usage.record(NOW + 10 * DAY_MS, 150, 1500)
+
+    assert usage.hours[:10] == [500] * 10
+    assert usage.usage_between(20_000, 20_009) == (50, 500)
+
+
+def test_store_is_bounded():
+    usage = DailyUsage()
+    usage.record(NOW, 0, 0)
+    for day in range(1, MAX_DAYS + 50):
+        usage.record(NOW + day * DAY_MS, day, day)
+
+    assert len(usage.hours) == MAX_DAYS
+    assert usage.first_day == 20_000 + 50
+
+
+def test_long_gap_does_not_grow_past_bound():
+    usage = DailyUsage()
+    usage.record(NOW, 0, 0)
+    usage.record(NOW + 10 * MAX_DAYS * DAY_MS, 3650, 0)
+    assert len(usage.hours) == MAX_DAYS
+    # the reading lands exactly at midnight, so today's bucket is empty
+    assert usage.usage_between(usage.first_day, usage.first_day + MAX_DAYS) == (364, 0)
+
+
+def test_average_over_any_window():
+    usage = DailyUsage()
+    usage.record(NOW, 0, 0)
+    for day in range(1, 31):
+        # 2 h/day for the first 15 days, 4 h/day after
+        hours = 2 * min(day, 15) + 4 * max(day - 15, 0)
+        usage.record(NOW + day * DAY_MS, hours, 10 * day)
+
+    now = NOW + 30 * DAY_MS
+    assert usage.average_rates(now, 7) == {"run_hours": 4, "odometer": 10}
+    assert usage.average_rates(now, 30) == {"run_hours": 3, "odometer": 10}
+    # longer than the data we have: averaged over the data we have
+    assert usage.average_rates(now, 90) == {"run_hours": 3, "odometer": 10}
+
+
+def test_out_of_order_readings_are_ignored():
+    usage = DailyUsage()
+    usage.record(NOW, 100, 1000)
+    usage.record(NOW + DAY_MS, 110, 1100)
+    assert usage.record(NOW + DAY_MS // 2, 90, 900) is False
+    assert usage.last == (NOW + DAY_MS, 110, 1100)
+
+
+def test_tag_round_trip():
+    usage = DailyUsage()
+    usage.record(NOW, 100.25, 1000.5)
+    usage.record(NOW + 3 * DAY_MS, 130.75, 1300.0)
+
+    restored = DailyUsage.from_tag(usage.to_tag())
+    assert restored.to_tag() == usage.to_tag()
+    assert DailyUsage.from_tag({"h": [1], "k": []}).is_empty
+    assert DailyUsage.from_tag("garbage").is_empty
+
+
+def test_no_rates_without_enough_data():
+    usage = DailyUsage()
+    assert usage.average_rates(NOW, 14) is None
+    usage.record(NOW, 100, 1000)
+    assert usage.average_rates(NOW + 1000, 14) is None